@@ -0,0 +1,279 @@
+# batch_cli.py
+"""
+Headless batch runner for fallout scenarios.
+
+Reads scenarios from a JSONL or CSV file (or stdin), computes each plume in a process
+pool and streams the results, in input order, as JSONL, a GeoJSON FeatureCollection or
+newline-delimited GeoJSON features, or into a memory-mapped plume archive (see
+plume_archive.py) for later replay. Only a bounded window of scenarios is in memory at
+any time, so inputs of any length can be processed. No display is needed.
+
+A scenario that cannot be read or computed does not stop the run: it is reported as
+{"id", "error"} (a feature with null geometry in GeoJSON, a line on stderr for archives).
+
+Example:
+    python batch_cli.py scenarios.csv --format geojson --workers 8 -o contours.geojson
+    python batch_cli.py scenarios.jsonl --format archive -o scenarios.plumes
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from dose_raster import local_miles_to_latlon, plume_frame_to_local
+from plume_archive import PlumeArchiveWriter, PlumeResult
+from plume_geometry import simplify_contours
+from plume_model import calculate_full_plume
+from task_pool import bounded_map
+
+# Accepted column / key names for each scenario field.
+FIELD_ALIASES = {
+    'yield_kt': ('yield_kt', 'yield', 'yield_kilotons'),
+    'wind_speed_kph': ('wind_speed_kph', 'wind_speed', 'wind_kph', 'wind'),
+    'wind_direction': ('wind_direction', 'direction', 'wind_dir'),
+    'lat': ('lat', 'latitude'),
+    'lon': ('lon', 'lng', 'longitude'),
+    'fission_fraction': ('fission_fraction',),
+    'id': ('id', 'scenario_id', 'name'),
+}
+
+def _normalize(record, index, defaults):
+    """
+    Maps one input record onto calculate_full_plume's parameter names. Values are not
+    converted here: that happens per scenario in _convert(), so one bad row only fails
+    its own scenario.
+    """
+    scenario = {'id': index}
+    scenario.update(defaults)
+    if isinstance(record, ValueError):
+        scenario['error'] = f"Invalid JSON: {record}"
+        return scenario
+    if not isinstance(record, dict):
+        scenario['error'] = f"Expected an object, got {type(record).__name__}"
+        return scenario
+    lowered = {str(k).strip().lower(): v for k, v in record.items()}
+    for field, aliases in FIELD_ALIASES.items():
+        for alias in aliases:
+            if alias in lowered and lowered[alias] not in ('', None):
+                scenario[field] = lowered[alias]
+                break
+    return scenario
+
+def _convert(scenario):
+    """Validates a normalized scenario and converts its values; raises ValueError if it is unusable."""
+    if 'error' in scenario:
+        raise ValueError(scenario['error'])
+    scenario = dict(scenario)
+    for field in ('yield_kt', 'wind_speed_kph'):
+        if field not in scenario:
+            raise ValueError(f"Missing {field} (one of: {', '.join(FIELD_ALIASES[field])})")
+    for field in ('yield_kt', 'wind_speed_kph', 'lat', 'lon', 'fission_fraction'):
+        if field in scenario:
+            try:
+                scenario[field] = float(scenario[field])
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid {field}: {scenario[field]!r}") from None
+    # Numeric directions are continuous angles; anything else is a compass point.
+    direction = scenario.get('wind_direction', 'N')
+    try:
+        scenario['wind_direction'] = float(direction)
+    except (TypeError, ValueError):
+        scenario['wind_direction'] = str(direction)
+    return scenario
+
+def _parse_line(line):
+    """A decoded JSONL record, or the decoding error for _normalize to report."""
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return e
+
+def read_scenarios(path, defaults=None):
+    """Yields normalized scenarios one at a time from a .jsonl/.json-lines or .csv file ('-' for stdin)."""
+    defaults = defaults or {}
+    stream = sys.stdin if path == '-' else open(path, newline='')
+    try:
+        if path.endswith('.csv'):
+            records = csv.DictReader(stream)
+        else:
+            records = (_parse_line(line) for line in stream if line.strip())
+        for index, record in enumerate(records):
+            yield _normalize(record, index, defaults)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def _to_lonlat(points, angle, lat, lon):
+    """Converts plume-frame miles to [lon, lat] pairs."""
+    east, north = plume_frame_to_local(points[:, 0], points[:, 1], angle)
+    lats, lons = local_miles_to_latlon(east, north, lat, lon)
+    return np.column_stack((lons, lats))
+
+def _error_outputs(scenario, error, options):
+    """Reports a failed scenario in the output format, or on stderr for archives."""
+    if options['format'] == 'archive':
+        print(f"Scenario {scenario['id']} failed: {error}", file=sys.stderr)
+        return []
+    record = {'id': scenario['id'], 'error': str(error)}
+    if options['format'] == 'jsonl':
+        return [json.dumps(record, separators=(',', ':'))]
+    # A feature without geometry keeps the collection valid GeoJSON.
+    return [json.dumps({'type': 'Feature', 'properties': record, 'geometry': None}, separators=(',', ':'))]
+
+def _scenario_outputs(scenario, options):
+    """
+    Computes one scenario and returns its output lines (already serialized), or for the
+    archive format a single (id, PlumeResult) pair. Any failure, from invalid input to
+    the model itself, is reported for this scenario alone.
+    """
+    try:
+        return _plume_outputs(_convert(scenario), options)
+    except Exception as e:
+        return _error_outputs(scenario, e, options)
+
+def _plume_outputs(scenario, options):
+    """The output of one converted scenario; see _scenario_outputs."""
+    georeferenced = 'lat' in scenario and 'lon' in scenario
+    if options['format'] in ('geojson', 'geojsonseq') and not georeferenced:
+        # RFC 7946 coordinates are WGS84 lon/lat; plume-frame miles would be invalid GeoJSON.
+        raise ValueError("GeoJSON output needs lat/lon (in the scenario or via --lat/--lon)")
+    fission_fraction = scenario.get('fission_fraction', 0.5)
+    plume = calculate_full_plume(scenario['yield_kt'], scenario['wind_speed_kph'], scenario['wind_direction'],
+                                 fission_fraction=fission_fraction, sampling=options['sampling'])
+    contours = plume['contours']
+    if options['tolerance'] > 0:
+        contours = simplify_contours(contours, options['tolerance'])
+    if options['format'] == 'archive':
+        # Archived contours stay in plume-frame miles; the inputs are stored alongside.
+        return [(scenario['id'], PlumeResult.from_plume(dict(plume, contours=contours), yield_kt=scenario['yield_kt'],
+                                                        wind_speed_kph=scenario['wind_speed_kph'],
+                                                        fission_fraction=fission_fraction))]
+    precision = options['precision']
+
+    rings = {}
+    for key, points in contours.items():
+        ring = _to_lonlat(points, plume['angle'], scenario['lat'], scenario['lon']) if georeferenced else points
+        ring = np.round(ring, precision)
+        rings[key] = np.concatenate((ring, ring[:1])).tolist()  # GeoJSON rings are closed.
+
+    if options['format'] == 'jsonl':
+        record = dict(scenario, angle=plume['angle'], coordinates='lonlat' if georeferenced else 'miles',
+                      contours=rings)
+        return [json.dumps(record, separators=(',', ':'))]
+
+    features = []
+    for key, ring in rings.items():
+        feature = {
+            'type': 'Feature',
+            'properties': dict(scenario, dose_rate_rad_hr=int(key.split('_')[0]), angle=plume['angle']),
+            'geometry': {'type': 'Polygon', 'coordinates': [ring]},
+        }
+        features.append(json.dumps(feature, separators=(',', ':')))
+    return features
+
+def _run_chunk(scenarios, options):
+    return [_scenario_outputs(scenario, options) for scenario in scenarios]
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def run_batch(scenarios, options, workers=None, chunk_size=64):
+    """
+    Yields the output lines of every scenario in input order.
+
+    Scenarios are sent to the pool in chunks, and at most two chunks per worker are in
+    flight, so memory stays bounded however long the input is. workers=0 runs inline.
+    """
+    tasks = ((chunk, options) for chunk in _chunks(scenarios, chunk_size))
+    if workers == 0:
+        for outputs in bounded_map(None, _run_chunk, tasks, 1):
+            for lines in outputs:
+                yield from lines
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for outputs in bounded_map(pool, _run_chunk, tasks, 2 * workers):
+            for lines in outputs:
+                yield from lines
+
+def write_output(lines, out, output_format):
+    """Writes output lines, wrapping them in a FeatureCollection for 'geojson'."""
+    if output_format == 'geojson':
+        out.write('{"type":"FeatureCollection","features":[\n')
+        first = True
+        try:
+            for line in lines:
+                if not first:
+                    out.write(',\n')
+                out.write(line)
+                first = False
+        finally:
+            # Close the collection even if the run is interrupted, keeping the rows written so far.
+            out.write('\n]}\n')
+    else:
+        # 'jsonl' and 'geojsonseq' are one JSON document per line.
+        for line in lines:
+            out.write(line)
+            out.write('\n')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run fallout plume scenarios without the UI.')
+    parser.add_argument('scenarios', help="JSONL or CSV file of scenarios, or '-' for JSONL on stdin")
+    parser.add_argument('-o', '--output', default='-', help="output file (default: stdout)")
+    parser.add_argument('--format', choices=('jsonl', 'geojson', 'geojsonseq', 'archive'), default='jsonl',
+                        help="'archive' writes (or appends to) a plume archive directory given by --output")
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (0 = run inline)')
+    parser.add_argument('--chunk-size', type=int, default=64, help='scenarios per worker task')
+    parser.add_argument('--sampling', choices=('linear', 'log', 'adaptive'), default='adaptive')
+    parser.add_argument('--tolerance', type=float, default=0.0,
+                        help='simplify contours to this many miles (0 = no simplification)')
+    parser.add_argument('--precision', type=int, default=6, help='decimal places in coordinates')
+    parser.add_argument('--lat', type=float, default=None, help='ground-zero latitude for scenarios without one')
+    parser.add_argument('--lon', type=float, default=None, help='ground-zero longitude for scenarios without one')
+    args = parser.parse_args(argv)
+    if args.format == 'archive' and args.output == '-':
+        parser.error('--format archive needs an --output directory')
+
+    defaults = {}
+    if args.lat is not None and args.lon is not None:
+        defaults = {'lat': args.lat, 'lon': args.lon}
+    options = {
+        'format': args.format,
+        'sampling': args.sampling,
+        'tolerance': args.tolerance,
+        'precision': args.precision,
+    }
+
+    scenarios = read_scenarios(args.scenarios, defaults)
+    lines = run_batch(scenarios, options, workers=args.workers, chunk_size=args.chunk_size)
+    if args.format == 'archive':
+        with PlumeArchiveWriter(args.output) as archive:
+            for scenario_id, result in lines:
+                try:
+                    archive.add(scenario_id, result)
+                except ValueError as e:  # Duplicate or over-long ID.
+                    print(f"Scenario {scenario_id} failed: {e}", file=sys.stderr)
+        return 0
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        write_output(lines, out, args.format)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,211 @@
+# run_benchmarks.py
+"""
+Benchmarks for the physics, geometry and rendering hot paths.
+
+Each benchmark is timed with an auto-ranged loop count, repeated, and the fastest
+per-call time is compared against benchmarks/baselines.json. A benchmark fails when
+it is slower than its baseline by more than the threshold (25% by default), and the
+script then exits with status 1. Baselines are machine specific: record them again
+with --update after changing machines or accepting a change in speed.
+
+Examples:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --filter full_plume --threshold 0.1
+    python benchmarks/run_benchmarks.py --update
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+DEFAULT_THRESHOLD = 0.25
+
+# name -> setup function returning the zero-argument callable to time.
+BENCHMARKS = {}
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+# --- Physics ---
+
+for _sampling in ('linear', 'log', 'adaptive'):
+    @benchmark(f'centerline[{_sampling}]')
+    def _centerline(sampling=_sampling):
+        from plume_model import _calculate_centerline_dose
+        return lambda: _calculate_centerline_dose(150, 15, 0.5, sampling)
+
+@benchmark('generate_contours')
+def _contours():
+    from plume_model import _calculate_centerline_dose, _generate_contours
+    centerline = _calculate_centerline_dose(150, 15, 0.5)
+    return lambda: _generate_contours(centerline)
+
+for _yield in (1, 150, 10000):
+    for _wind in (5, 24, 80):
+        @benchmark(f'full_plume[{_yield}kt,{_wind}kph]')
+        def _full_plume(yield_kt=_yield, wind=_wind):
+            from plume_model import calculate_full_plume
+            return lambda: calculate_full_plume(yield_kt, wind, 'E', sampling='adaptive')
+
+@benchmark('generate_dose_data[scalar]')
+def _dose_data():
+    from dose_decay import generate_dose_data
+    return lambda: generate_dose_data(1000.0)
+
+@benchmark('generate_dose_data[1000 rates]')
+def _dose_data_array():
+    import numpy as np
+    from dose_decay import generate_dose_data
+    rates = np.linspace(1, 5000, 1000)
+    return lambda: generate_dose_data(rates)
+
+# --- Geometry and Rendering ---
+
+def _plume_contours():
+    from plume_model import calculate_full_plume
+    return calculate_full_plume(150, 24, 'E', sampling='adaptive')['contours']
+
+@benchmark('triangulate_polygon')
+def _triangulate():
+    from plume_geometry import triangulate_polygon
+    points = _plume_contours()['10_rad_hr']
+    return lambda: triangulate_polygon(points)
+
+def _drawing_widget():
+    """A PlumeDrawingWidget off screen. Returns None when Kivy cannot start here."""
+    os.environ.setdefault('KIVY_NO_ARGS', '1')
+    os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+    try:
+        import main
+    except Exception as e:
+        print(f"  (Kivy unavailable: {e})")
+        return None
+    return main.PlumeDrawingWidget(contours=_plume_contours(), angle=90)
+
+@benchmark('widget.triangulate_polygon')
+def _widget_triangulate():
+    widget = _drawing_widget()
+    if widget is None:
+        return None
+    contours = _plume_contours()
+    # Fresh copies, so contour_buffers' per-array cache is not hit.
+    return lambda: [widget.triangulate_polygon(points.copy()) for points in contours.values()]
+
+@benchmark('widget.set_plume')
+def _widget_set_plume():
+    widget = _drawing_widget()
+    if widget is None:
+        return None
+    contours = _plume_contours()
+    return lambda: widget.set_plume({k: v.copy() for k, v in contours.items()}, 90)
+
+@benchmark('widget.draw_plume')
+def _widget_draw():
+    widget = _drawing_widget()
+    if widget is None:
+        return None
+    return widget.draw_plume
+
+@benchmark('render_dose_graph')
+def _graph():
+    from dose_graph import render_dose_graph
+    return lambda: render_dose_graph(150)
+
+# --- Runner ---
+
+def measure(func, repeat=5, min_time=0.2):
+    """Fastest per-call time (seconds) over `repeat` runs of an auto-ranged loop."""
+    func()  # Warm up imports and caches outside the timing.
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+def _format_time(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+def load_baselines(path=BASELINES_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'benchmarks': {}}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the performance benchmarks.')
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed slowdown over the baseline, as a fraction (default 0.25)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--update', action='store_true', help='record the results as the new baselines')
+    parser.add_argument('--json', default=None, help='also write the results to this file')
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines()
+    results = {}
+    regressions = []
+    print(f"{'benchmark':<34}{'time':>12}{'baseline':>12}{'change':>9}")
+    for name, setup in BENCHMARKS.items():
+        if args.filter not in name:
+            continue
+        func = setup()
+        if func is None:
+            print(f"{name:<34}{'skipped':>12}")
+            continue
+        seconds = measure(func, repeat=args.repeat)
+        results[name] = seconds
+        baseline = baselines['benchmarks'].get(name)
+        if baseline is None:
+            print(f"{name:<34}{_format_time(seconds):>12}{'-':>12}")
+            continue
+        change = seconds / baseline - 1
+        flag = '  REGRESSION' if change > args.threshold else ''
+        print(f"{name:<34}{_format_time(seconds):>12}{_format_time(baseline):>12}{change:>+9.0%}{flag}")
+        if flag:
+            regressions.append(name)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.update:
+        baselines['benchmarks'].update(results)
+        baselines['machine'] = {'python': platform.python_version(), 'platform': platform.platform(),
+                                'processor': platform.processor() or platform.machine()}
+        with open(BASELINES_PATH, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baselines updated: {BASELINES_PATH}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}: "
+              + ', '.join(regressions))
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,16 @@
 # dose_decay.py
 import math
 
-def generate_dose_data(initial_dose_rate):
+import numpy as np
+
+# Fallout is assumed to arrive no earlier than this (hours after detonation). The t^-1.2
+# law is not meant for the first minutes, and its integral diverges as t approaches 0.
+MIN_ARRIVAL_HOURS = 0.5
+
+# Default time axis for dose graphs: integer hours 1 to 100.
+DEFAULT_TIME_POINTS = np.arange(1, 101)
+
+def generate_dose_data(initial_dose_rate, time_points=None):
     """
     Generates dose data points for a graph showing radioactive decay over time.
     
@@ -9,20 +18,25 @@ def generate_dose_data(initial_dose_rate):
     which is a well-established empirical relationship.
     
     Args:
-        initial_dose_rate (float): Initial dose rate in rad/hr at t=1 hour
+        initial_dose_rate (float or array): Initial dose rate in rad/hr at t=1 hour.
+            An array of rates gives one curve per rate along the first axis.
+        time_points (array, optional): Times in hours; defaults to hours 1 to 100.
     
     Returns:
-        tuple: (time_points, dose_data) where both are lists of equal length
+        tuple: (time_points, dose_data) as NumPy arrays; dose_data has shape
+        initial_dose_rate.shape + time_points.shape
     """
     # Using the t^-1.2 rule, a standard model for fallout decay
-    time_points = [x for x in range(1, 101)]  # 1 to 100 hours
-    dose_data = [initial_dose_rate * (time ** -1.2) for time in time_points]
+    time_points = DEFAULT_TIME_POINTS if time_points is None else np.asarray(time_points, dtype=float)
+    initial_dose_rate = np.asarray(initial_dose_rate, dtype=float)
+    dose_data = initial_dose_rate[..., None] * (time_points.astype(float) ** -1.2)
     
     return time_points, dose_data
 
 def calculate_integrated_dose(initial_dose_rate, start_time, end_time):
     """
     Calculates the total integrated dose over a time period.
+    All arguments may be NumPy arrays; they broadcast against each other.
     
     Args:
         initial_dose_rate (float): Initial dose rate in rad/hr at t=1 hour
@@ -40,6 +54,119 @@ def calculate_integrated_dose(initial_dose_rate, start_time, end_time):
     
     return antiderivative(end_time) - antiderivative(start_time)
 
+class ExposureField:
+    """
+    Integrated-dose calculator for a whole map of locations at once.
+
+    Takes the H+1 dose-rate field (any array shape) and the fallout arrival time at each
+    location. The arrival-dependent term of the t^-1.2 integral is computed once here and
+    reused for every exposure window, so comparing many shelter policies only costs a
+    couple of array operations per window.
+    """
+
+    def __init__(self, h1_dose_rates, arrival_hours=MIN_ARRIVAL_HOURS):
+        self.h1_dose_rates = np.asarray(h1_dose_rates, dtype=float)
+        arrival = np.maximum(np.asarray(arrival_hours, dtype=float), MIN_ARRIVAL_HOURS)
+        # Integral scale 5 * R1 and arrival^-0.2, broadcast to the field shape.
+        self._scale = 5.0 * self.h1_dose_rates
+        self._arrival_term = np.broadcast_to(arrival ** -0.2, self.h1_dose_rates.shape)
+
+    def window_dose(self, start_time, end_time, protection_factor=1.0, out=None):
+        """
+        Dose (rads) received between start_time and end_time (hours after detonation),
+        counting only the time after fallout arrives, divided by the protection factor.
+        """
+        # For t >= arrival, max(t, arrival)^-0.2 == min(t^-0.2, arrival^-0.2).
+        start_term = np.minimum(max(start_time, MIN_ARRIVAL_HOURS) ** -0.2, self._arrival_term)
+        end_term = np.minimum(max(end_time, MIN_ARRIVAL_HOURS) ** -0.2, start_term)
+        out = np.subtract(start_term, end_term, out=out)
+        out *= self._scale
+        out /= protection_factor
+        return out
+
+    def schedule_dose(self, schedule, out=None):
+        """
+        Total dose for a schedule of (start, end, protection_factor) segments, e.g.
+        [(0, 24, 40), (24, 26, 1)] for a day in a basement followed by a two-hour evacuation.
+        """
+        total = np.zeros(self.h1_dose_rates.shape) if out is None else out
+        if out is not None:
+            total[...] = 0.0
+        segment = np.empty(self.h1_dose_rates.shape)
+        for start_time, end_time, protection_factor in schedule:
+            total += self.window_dose(start_time, end_time, protection_factor, out=segment)
+        return total
+
+    def integrated_dose_maps(self, windows):
+        """
+        Evaluates many exposure windows into one (n_windows, *field_shape) array.
+        Each window is either (start, end), (start, end, protection_factor) or a
+        shelter schedule (a list of such segments).
+        """
+        maps = np.empty((len(windows),) + self.h1_dose_rates.shape)
+        for i, window in enumerate(windows):
+            if len(window) and isinstance(window[0], (tuple, list)):
+                self.schedule_dose(window, out=maps[i])
+            else:
+                self.window_dose(*window, out=maps[i])
+        return maps
+
+# Default candidate shelter-exit times: 200 log-spaced times from H+0.5 to two weeks.
+DEFAULT_EXIT_HOURS = np.geomspace(MIN_ARRIVAL_HOURS, 336, num=200)
+
+def optimal_evacuation_times(h1_dose_rates, arrival_hours, shelter_pf, transit_hours, transit_pf=1.0,
+                             candidate_exit_hours=None):
+    """
+    Finds the best time to leave shelter and evacuate, for every location at once.
+
+    People shelter (protection factor shelter_pf) from fallout arrival until the exit time,
+    then spend transit_hours travelling out (protection factor transit_pf) and receive
+    no further dose. Using the closed-form t^-1.2 integral, the dose per unit H+1 rate for
+    exiting at a time t after arrival A is
+
+        5 * A^-0.2 / shelter_pf + g(t),   g(t) = 5 * (-t^-0.2 / shelter_pf + (t^-0.2 - (t+T)^-0.2) / transit_pf)
+
+    and g does not depend on the location. So g is evaluated once over all candidate
+    exit times, and each location only needs the minimum of g over candidates at or after
+    its arrival (a suffix minimum, found with one searchsorted) compared against leaving
+    at the earliest candidate before fallout arrives.
+
+    Returns:
+        tuple: (exit_hours, total_dose) arrays shaped like the broadcast inputs.
+    """
+    candidates = DEFAULT_EXIT_HOURS if candidate_exit_hours is None else np.asarray(candidate_exit_hours, dtype=float)
+    candidates = np.unique(np.maximum(candidates, MIN_ARRIVAL_HOURS))
+    rates, arrival = np.broadcast_arrays(np.asarray(h1_dose_rates, dtype=float),
+                                         np.asarray(arrival_hours, dtype=float))
+    arrival = np.maximum(arrival, MIN_ARRIVAL_HOURS)
+    arrival_term = arrival ** -0.2
+    n = len(candidates)
+
+    # --- Location-independent part: g(t) and its earliest suffix minimum ---
+    exit_term = candidates ** -0.2
+    leave_term = (candidates + transit_hours) ** -0.2
+    g = 5.0 * (-exit_term / shelter_pf + (exit_term - leave_term) / transit_pf)
+    suffix_min = np.minimum.accumulate(g[::-1])[::-1]
+    # For each start index, the first index at or after it that attains the suffix minimum.
+    is_min = g == suffix_min
+    first_min = np.minimum.accumulate(np.where(is_min, np.arange(n), n)[::-1])[::-1]
+
+    # --- Option 1: exit at the first candidate at or after arrival ---
+    k = np.searchsorted(candidates, arrival, side='left')
+    after = k < n
+    best_after = first_min[np.minimum(k, n - 1)]
+    dose_after = np.where(after, 5.0 * arrival_term / shelter_pf + g[best_after], np.inf)
+
+    # --- Option 2: leave at the earliest candidate, before fallout arrives ---
+    # Only the part of the journey after arrival counts.
+    before = candidates[0] < arrival
+    dose_before = np.where(before, 5.0 * (arrival_term - np.minimum(leave_term[0], arrival_term)) / transit_pf, np.inf)
+
+    leave_early = dose_before <= dose_after
+    exit_hours = np.where(leave_early, candidates[0], candidates[best_after])
+    total_dose = rates * np.where(leave_early, dose_before, dose_after)
+    return exit_hours, total_dose
+
 # Test function - run this file directly to see sample output
 if __name__ == '__main__':
     print("Testing dose decay calculations...")
@@ -57,4 +184,9 @@ if __name__ == '__main__':
     print(f"\nTotal dose in first 24 hours: {integrated_24h:.1f} rads")
     
     integrated_week = calculate_integrated_dose(1000, 1, 169)  # First week
-    print(f"Total dose in first week: {integrated_week:.1f} rads")
\ No newline at end of file
+    print(f"Total dose in first week: {integrated_week:.1f} rads")
+
+    # Test the evacuation-time optimizer for a basement shelter and a 2 hour drive out
+    exit_hours, total_dose = optimal_evacuation_times([1000, 1000], [0.5, 3], shelter_pf=40, transit_hours=2)
+    print(f"\nBest exit time (fallout at H+0.5): H+{exit_hours[0]:.1f}, dose {total_dose[0]:.1f} rads")
+    print(f"Best exit time (fallout at H+3): H+{exit_hours[1]:.1f}, dose {total_dose[1]:.1f} rads")
\ No newline at end of file
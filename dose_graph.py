@@ -0,0 +1,38 @@
+# dose_graph.py
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import matplotlib.style
+
+from dose_decay import generate_dose_data
+from fallout_calculator import calculate_initial_dose_rate
+
+def render_dose_graph(yield_kt, width_px=600, height_px=400, dpi=100):
+    """
+    Renders the dose-rate graph for a yield into an in-memory RGBA buffer.
+
+    Uses matplotlib's object-oriented Agg API (no pyplot global state, nothing written
+    to disk), so it is safe to call from a worker thread. Nothing is cached here: the
+    app keeps the uploaded texture per yield, so the pixels are not held twice.
+
+    Returns:
+        tuple: (rgba_bytes, (width, height)) with rows ordered top to bottom
+    """
+    # Calculate a location-specific initial dose rate
+    initial_dose_rate = calculate_initial_dose_rate(yield_kt)
+    time_points, dose_data = generate_dose_data(initial_dose_rate)
+
+    with matplotlib.style.context('dark_background'):
+        figure = Figure(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
+        figure.patch.set_alpha(0)
+        canvas = FigureCanvasAgg(figure)
+        axes = figure.add_subplot()
+        axes.patch.set_alpha(0)
+        axes.plot(time_points, dose_data, color='cyan')
+        axes.set_title('Dose Rate vs. Time', color='white')
+        axes.set_xlabel('Time (hours)', color='white')
+        axes.set_ylabel('Dose Rate (rad/hr)', color='white')
+        axes.grid(True, linestyle='--', alpha=0.6)
+        canvas.draw()
+        width, height = canvas.get_width_height()
+        return bytes(canvas.buffer_rgba()), (width, height)
@@ -0,0 +1,178 @@
+# dose_raster.py
+
+import numpy as np
+
+from dose_decay import ExposureField
+from plume_model import (
+    CROSSWIND_K, DEFAULT_DISTANCES_MILES, MPH_PER_KPH,
+    _cutoff_distance, _direction_angle, _dose_field, _wseg10_dose_rates,
+)
+
+# Miles per degree of latitude. Longitude degrees shrink by cos(latitude).
+MILES_PER_DEGREE_LAT = 69.055
+
+# --- Coordinate Helpers ---
+# Plume-scale areas (a few hundred miles) are small enough for a local equirectangular
+# projection around ground zero. Angles follow DIRECTION_MAP: degrees clockwise from north.
+
+def latlon_to_local_miles(lats, lons, lat0, lon0):
+    """Converts lat/lon arrays to (east, north) miles relative to (lat0, lon0)."""
+    north = (np.asarray(lats, dtype=float) - lat0) * MILES_PER_DEGREE_LAT
+    east = (np.asarray(lons, dtype=float) - lon0) * (MILES_PER_DEGREE_LAT * np.cos(np.radians(lat0)))
+    return east, north
+
+def local_miles_to_latlon(east, north, lat0, lon0):
+    """Inverse of latlon_to_local_miles."""
+    lats = lat0 + np.asarray(north, dtype=float) / MILES_PER_DEGREE_LAT
+    lons = lon0 + np.asarray(east, dtype=float) / (MILES_PER_DEGREE_LAT * np.cos(np.radians(lat0)))
+    return lats, lons
+
+def local_to_plume_frame(east, north, angle):
+    """Rotates (east, north) miles into (downwind, crosswind) miles for a wind angle in degrees."""
+    theta = np.radians(angle)
+    sin_t, cos_t = np.sin(theta), np.cos(theta)
+    downwind = east * sin_t + north * cos_t
+    crosswind = -east * cos_t + north * sin_t  # Positive to the left of the downwind direction.
+    return downwind, crosswind
+
+def plume_frame_to_local(downwind, crosswind, angle):
+    """Inverse of local_to_plume_frame."""
+    theta = np.radians(angle)
+    sin_t, cos_t = np.sin(theta), np.cos(theta)
+    east = downwind * sin_t - crosswind * cos_t
+    north = downwind * cos_t + crosswind * sin_t
+    return east, north
+
+def plume_extent(yield_kt, wind_speed_mph, fission_fraction, min_dose, max_distance=300.0):
+    """
+    Returns (length, half_width) in miles of the area where the dose rate reaches min_dose:
+    how far it reaches downwind and how far it spreads to either side of the centerline.
+    """
+    length = _cutoff_distance(yield_kt, wind_speed_mph, fission_fraction, min_dose, max_distance)
+    distances = np.geomspace(DEFAULT_DISTANCES_MILES[0], length, num=512)
+    doses = _wseg10_dose_rates(yield_kt, wind_speed_mph, fission_fraction, distances)
+    half_width = np.max(distances * np.sqrt(np.log(np.maximum(doses / min_dose, 1.0)) / CROSSWIND_K))
+    return length, float(half_width)
+
+class DoseRaster:
+    """
+    A georeferenced H+1 dose-rate grid (rad/hr).
+
+    values[i, j] is the dose at the cell centre u = x0 + j * cell_miles, v = y0 + i * cell_miles,
+    where (u, v) are miles along and to the left of a frame axis rotated `angle` degrees
+    clockwise from north and centred on (lat0, lon0). A plume raster uses the wind angle,
+    so the grid hugs the plume; angle=90 gives an ordinary east/north grid.
+    """
+
+    def __init__(self, values, lat0, lon0, angle, cell_miles, x0, y0, source=None):
+        self.values = np.ascontiguousarray(values, dtype=np.float32)
+        self.lat0 = float(lat0)
+        self.lon0 = float(lon0)
+        self.angle = float(angle)
+        self.cell_miles = float(cell_miles)
+        self.x0 = float(x0)
+        self.y0 = float(y0)
+        # Physics inputs of a single-burst raster, used by exact() and arrival-time maps.
+        self.source = source
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @classmethod
+    def from_plume(cls, yield_kt, wind_speed_kph, wind_direction, lat, lon, fission_fraction=0.5,
+                   min_dose=0.1, cell_miles=None, resolution=1000, max_distance=300.0):
+        """
+        Evaluates the WSEG-10 centerline and Gaussian crosswind model onto a grid aligned
+        with the wind and centred on ground zero at (lat, lon).
+
+        The grid covers everything above `min_dose`. If `cell_miles` is not given, the
+        cell size is chosen so the downwind extent spans `resolution` cells.
+        """
+        wind_speed_mph = wind_speed_kph * MPH_PER_KPH
+        angle = _direction_angle(wind_direction)
+
+        # --- Step 1: Extent of the area above min_dose ---
+        length, half_width = plume_extent(yield_kt, wind_speed_mph, fission_fraction, min_dose, max_distance)
+
+        if cell_miles is None:
+            cell_miles = length / resolution
+
+        # --- Step 2: Cell centres in the plume frame (one cell of margin on every side) ---
+        n_x = int(np.ceil(length / cell_miles)) + 2
+        n_y = 2 * int(np.ceil(half_width / cell_miles)) + 3
+        x0 = -cell_miles
+        y0 = -(n_y // 2) * cell_miles
+        u = x0 + cell_miles * np.arange(n_x)
+        v = y0 + cell_miles * np.arange(n_y)
+
+        # --- Step 3: Evaluate the whole grid in one broadcast call ---
+        values = _dose_field(u[None, :], v[:, None], yield_kt, wind_speed_mph, fission_fraction)
+
+        source = {
+            'yield_kt': yield_kt,
+            'wind_speed_mph': wind_speed_mph,
+            'fission_fraction': fission_fraction,
+        }
+        return cls(values, lat, lon, angle, cell_miles, x0, y0, source=source)
+
+    def to_frame(self, lats, lons):
+        """Converts lat/lon arrays to (u, v) miles in this raster's frame."""
+        east, north = latlon_to_local_miles(lats, lons, self.lat0, self.lon0)
+        return local_to_plume_frame(east, north, self.angle)
+
+    def cell_centers(self):
+        """Returns the (u, v) frame coordinates of every cell centre, each of shape self.shape."""
+        n_y, n_x = self.shape
+        u = self.x0 + self.cell_miles * np.arange(n_x)
+        v = self.y0 + self.cell_miles * np.arange(n_y)
+        return np.meshgrid(u, v)
+
+    def cell_latlons(self):
+        """Returns the (lats, lons) of every cell centre."""
+        u, v = self.cell_centers()
+        east, north = plume_frame_to_local(u, v, self.angle)
+        return local_miles_to_latlon(east, north, self.lat0, self.lon0)
+
+    def sample(self, lats, lons):
+        """
+        Bilinearly interpolates the dose rate at any number of lat/lon points in one call.
+        Points outside the grid get 0.
+        """
+        u, v = self.to_frame(lats, lons)
+        fx = (u - self.x0) / self.cell_miles
+        fy = (v - self.y0) / self.cell_miles
+        n_y, n_x = self.shape
+
+        inside = (fx >= 0) & (fx <= n_x - 1) & (fy >= 0) & (fy <= n_y - 1)
+        # Clamp so the lower-left corner index is always valid; outside points are zeroed below.
+        ix = np.clip(np.floor(fx).astype(np.intp), 0, max(n_x - 2, 0))
+        iy = np.clip(np.floor(fy).astype(np.intp), 0, max(n_y - 2, 0))
+        tx = np.clip(fx - ix, 0.0, 1.0)
+        ty = np.clip(fy - iy, 0.0, 1.0)
+        ix1 = np.minimum(ix + 1, n_x - 1)
+        iy1 = np.minimum(iy + 1, n_y - 1)
+
+        grid = self.values
+        bottom = grid[iy, ix] * (1 - tx) + grid[iy, ix1] * tx
+        top = grid[iy1, ix] * (1 - tx) + grid[iy1, ix1] * tx
+        return np.where(inside, bottom * (1 - ty) + top * ty, 0.0)
+
+    def exact(self, lats, lons):
+        """Evaluates the plume model directly at lat/lon points (no grid interpolation)."""
+        if self.source is None:
+            raise ValueError("exact() needs a raster built by DoseRaster.from_plume")
+        u, v = self.to_frame(lats, lons)
+        return _dose_field(u, v, self.source['yield_kt'], self.source['wind_speed_mph'],
+                           self.source['fission_fraction'])
+
+    def arrival_hours(self):
+        """Fallout arrival time (hours) at every cell: downwind distance / wind speed."""
+        if self.source is None:
+            raise ValueError("arrival_hours() needs a raster built by DoseRaster.from_plume")
+        u, _ = self.cell_centers()
+        return np.maximum(u, 0.0) / self.source['wind_speed_mph']
+
+    def exposure_field(self):
+        """An ExposureField over this raster, for integrated-dose maps over any time windows."""
+        return ExposureField(self.values, self.arrival_hours())
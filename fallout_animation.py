@@ -0,0 +1,93 @@
+# fallout_animation.py
+
+from collections import OrderedDict
+
+import numpy as np
+
+from dose_decay import MIN_ARRIVAL_HOURS, generate_dose_data
+from plume_geometry import plume_slabs
+
+class FalloutAnimation:
+    """
+    Fallout arrival and decay over H+0 to H+end_hours, for one single-burst plume.
+
+    Every contour is cut into downwind slabs once, up front. A slab lights up when the
+    fallout reaches it (downwind distance / wind speed) and its colour then follows the
+    t^-1.2 decay: a contour drawn at H+1 rate L shows the colour band of L * t^-1.2, and
+    fades out once that drops below the lowest band. A frame is therefore just one RGBA
+    colour per slab mesh, so playback never touches geometry. Frames are computed on
+    demand and cached.
+    """
+
+    def __init__(self, contours, wind_speed_mph, colors, end_hours=24.0, frame_count=240,
+                 fps=30, slab_count=48, max_cached_frames=1024):
+        self.fps = fps
+        self.times = np.linspace(0.0, end_hours, frame_count)
+        self.max_cached_frames = max_cached_frames
+        self._frames = OrderedDict()
+
+        # Colour bands, highest dose first, as (level, rgba).
+        self.bands = sorted(((float(k.split('_')[0]), tuple(v)) for k, v in colors.items()), reverse=True)
+
+        # --- Step 1: Cut every contour into slabs on one shared set of boundaries ---
+        length = max((float(np.max(p[:, 0])) for p in contours.values() if len(p)), default=0.0)
+        edges = np.linspace(0.0, length, slab_count + 1)
+        keys = sorted(contours, key=lambda k: float(k.split('_')[0]), reverse=True)
+
+        self.meshes = []  # (vertices, indices) per slab, in drawing order
+        levels, starts, ends = [], [], []
+        for key in keys:
+            if len(contours[key]) < 3:
+                continue
+            for i, vertices, indices in plume_slabs(contours[key], edges):
+                self.meshes.append((vertices, indices))
+                levels.append(float(key.split('_')[0]))
+                starts.append(edges[i])
+                ends.append(min(edges[i + 1], float(vertices[:, 0].max())))
+        self.levels = np.array(levels)
+
+        # --- Step 2: Arrival window of every slab (hours) ---
+        self.arrival_start = np.array(starts) / wind_speed_mph
+        self.arrival_end = np.maximum(np.array(ends) / wind_speed_mph, self.arrival_start + 1e-9)
+
+    def __len__(self):
+        return len(self.times)
+
+    def _compute(self, index):
+        t = self.times[index]
+        rgba = np.zeros((len(self.meshes), 4), dtype=np.float32)
+        if not len(self.meshes):
+            return rgba
+
+        # Dose rate at time t on each slab's contour.
+        _, rates = generate_dose_data(self.levels, [max(t, MIN_ARRIVAL_HOURS)])
+        rates = rates[:, 0]
+
+        # Colour band the current rate falls in; below the lowest band the slab fades out.
+        lowest_level, lowest_color = self.bands[-1]
+        rgba[:] = lowest_color
+        for level, color in reversed(self.bands):
+            rgba[rates >= level] = color
+        fade = np.clip(rates / lowest_level, 0.0, 1.0)
+
+        # Partly reached slabs fade in as the fallout front crosses them.
+        arrived = np.clip((t - self.arrival_start) / (self.arrival_end - self.arrival_start), 0.0, 1.0)
+        rgba[:, 3] *= arrived * fade
+        return rgba
+
+    def frame(self, index):
+        """RGBA colours (n_meshes, 4) of frame `index`, from the cache when available."""
+        rgba = self._frames.get(index)
+        if rgba is None:
+            rgba = self._compute(index)
+            self._frames[index] = rgba
+            while len(self._frames) > self.max_cached_frames:
+                self._frames.popitem(last=False)
+        else:
+            self._frames.move_to_end(index)
+        return rgba
+
+    def frames(self, start=0):
+        """Yields (hours, rgba) for each frame from `start`, computing each only when it is needed."""
+        for index in range(start, len(self.times)):
+            yield self.times[index], self.frame(index)
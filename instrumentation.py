@@ -0,0 +1,87 @@
+# instrumentation.py
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+# Set NUCLEAR_TRACE=1 to record timing spans around the physics and render stages.
+ENABLED = os.environ.get('NUCLEAR_TRACE', '') not in ('', '0')
+
+# Optional JSONL file receiving one record per finished span.
+LOG_PATH = os.environ.get('NUCLEAR_TRACE_LOG') or None
+
+class SpanRecorder:
+    """
+    Collects timing spans: a bounded window of recent spans for the on-screen overlay,
+    plus an optional structured log with one JSON object per line:
+    {"name", "start", "duration_ms", "thread", ...extra fields}. Safe to use from the
+    UI thread and the worker threads at the same time.
+    """
+
+    def __init__(self, log_path=None, history=512):
+        self.t0 = time.perf_counter()
+        self.log_path = log_path
+        self.spans = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._log = None
+
+    @contextmanager
+    def span(self, name, **fields):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter() - start, **fields)
+
+    def record(self, name, start, duration, **fields):
+        entry = {
+            'name': name,
+            'start': round(start - self.t0, 6),
+            'duration_ms': round(duration * 1000, 3),
+            'thread': threading.current_thread().name,
+        }
+        entry.update(fields)
+        with self._lock:
+            self.spans.append(entry)
+            if self.log_path:
+                if self._log is None:
+                    self._log = open(self.log_path, 'a', buffering=1)
+                self._log.write(json.dumps(entry) + '\n')
+
+    def summary(self):
+        """{name: (count, last_ms, mean_ms)} over the recent spans, in first-seen order."""
+        with self._lock:
+            spans = list(self.spans)
+        totals = {}
+        for entry in spans:
+            count, _, total = totals.get(entry['name'], (0, 0.0, 0.0))
+            totals[entry['name']] = (count + 1, entry['duration_ms'], total + entry['duration_ms'])
+        return {name: (count, last, total / count) for name, (count, last, total) in totals.items()}
+
+    def report(self):
+        lines = [f"{'span':<26}{'last':>9}{'mean':>9}{'n':>6}"]
+        for name, (count, last, mean) in self.summary().items():
+            lines.append(f"{name:<26}{last:>9.2f}{mean:>9.2f}{count:>6}")
+        return '\n'.join(lines)
+
+    def close(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+recorder = SpanRecorder(LOG_PATH)
+
+def span(name, **fields):
+    """
+    Times the enclosed block as `name` when tracing is enabled. When it is not, this
+    returns a shared no-op context, so spans can stay in hot paths.
+    """
+    if not ENABLED:
+        return _NO_SPAN
+    return recorder.span(name, **fields)
+
+_NO_SPAN = nullcontext()
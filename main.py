@@ -1,38 +1,90 @@
 # main.py (Fixed Import Error - Complete Version)
 
-import kivy
+# Startup is timed from here; heavy modules (NumPy, the plume physics, matplotlib and the
+# graph subsystem) are not imported at module load. They are imported on first use or
+# warmed up on the worker thread once the first frame is on screen.
+from startup_profile import startup, REPORT_ENABLED
+
 import os
-import matplotlib.pyplot as plt
-from kivy.app import App
-from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.gridlayout import GridLayout
-from kivy.uix.relativelayout import RelativeLayout
-from kivy.uix.label import Label
-from kivy.uix.textinput import TextInput
-from kivy.uix.button import Button
-from kivy.uix.popup import Popup
-from kivy.uix.image import Image as KivyImage
-from kivy.uix.widget import Widget
-from kivy.uix.spinner import Spinner
-from kivy.graphics import Color, Rotate, PushMatrix, PopMatrix, Rectangle, Ellipse
-# CORRECT IMPORTS: Use Mesh and Line for drawing shapes
-from kivy.graphics.vertex_instructions import Mesh, Line
-from kivy.core.window import Window
-
-# Import the correct function from your backend
-from plume_model import calculate_full_plume
-from dose_decay import generate_dose_data
-from fallout_calculator import calculate_initial_dose_rate
-
-# Ensure the window size is set
-Window.size = (1000, 700)
+
+with startup.phase('import kivy'):
+    import kivy
+    from kivy.app import App
+    from kivy.clock import Clock
+    from kivy.uix.boxlayout import BoxLayout
+    from kivy.uix.gridlayout import GridLayout
+    from kivy.uix.relativelayout import RelativeLayout
+    from kivy.uix.label import Label
+    from kivy.uix.textinput import TextInput
+    from kivy.uix.button import Button
+    from kivy.uix.image import Image as KivyImage
+    from kivy.uix.widget import Widget
+    from kivy.uix.spinner import Spinner
+    from kivy.graphics import (Color, Rotate, PushMatrix, PopMatrix, Rectangle, Ellipse,
+                               Translate, Scale, InstructionGroup)
+    # CORRECT IMPORTS: Use Mesh and Line for drawing shapes
+    from kivy.graphics.vertex_instructions import Mesh, Line
+
+with startup.phase('create window'):
+    from kivy.core.window import Window
+    # Ensure the window size is set
+    Window.size = (1000, 700)
+
+with startup.phase('import app modules'):
+    import instrumentation
+    from instrumentation import span
+    from sim_worker import SimulationWorker, debounce
+    from map_widget import OfflineMap
+
+def _show_message(title, text):
+    from kivy.uix.popup import Popup
+    popup = Popup(title=title, content=Label(text=text), size_hint=(None, None), size=(400, 200))
+    popup.open()
+
+def _warm_up():
+    """Imports the heavy modules on the worker thread so first use does not stall the UI."""
+    with startup.phase('warm-up: plume physics'):
+        import plume_cache, plume_geometry
+    with startup.phase('warm-up: dose graph'):
+        import dose_graph
+
+def _render_graph(yield_kt):
+    from dose_graph import render_dose_graph
+    with span('graph.render'):
+        return render_dose_graph(yield_kt)
+
+def _calculate_bursts(bursts):
+    """Combines the bursts and prepares their drawing buffers, all on the worker thread."""
+    from multi_burst import calculate_multi_burst
+    from plume_geometry import ContourLOD
+    result = calculate_multi_burst(bursts)
+    with span('render.lod'):
+        result['lod'] = ContourLOD(result['contours']).build_buffers()
+    return result
+
+def _build_animation(contours, wind_speed_kph, colors):
+    from fallout_animation import FalloutAnimation
+    from plume_model import MPH_PER_KPH
+    with span('animation.build'):
+        return FalloutAnimation(contours, wind_speed_kph * MPH_PER_KPH, colors)
 
 class PlumeDrawingWidget(Widget):
-    """A custom widget for drawing the fallout plume polygons."""
-    def __init__(self, contours, angle, **kwargs):
+    """
+    A custom widget for drawing the fallout plume polygons.
+
+    Drawing is retained: vertex and index buffers are built once per result and kept as
+    Mesh/Line instructions in the contours' own units (miles). Moving, resizing or
+    rotating the widget only updates the Translate/Rotate/Scale instructions in front
+    of them. Contours are drawn from the coarsest level-of-detail tier that still looks
+    exact at the current scale.
+    """
+    # Scaling factor to make the plume visible (miles -> pixels)
+    SCALE_FACTOR = 2.0
+
+    def __init__(self, contours, angle, lod=None, **kwargs):
         super().__init__(**kwargs)
-        self.contours = contours
-        self.angle = angle
+        self.pixels_per_mile = self.SCALE_FACTOR
+        self.origin = None
         # This dictionary maps dose levels to colors (R, G, B, Alpha)
         self.dose_colors = {
             '1000_rad_hr': (1, 0, 0, 0.8),    # Red
@@ -41,101 +93,189 @@ class PlumeDrawingWidget(Widget):
             '30_rad_hr':   (0.5, 1, 0, 0.5),  # Lime Green
             '10_rad_hr':   (0, 1, 0, 0.4),    # Green
         }
-        # Call the drawing function when the widget size is known
-        self.bind(size=self.draw_plume)
+        self._animation_event = None
+        with self.canvas:
+            PushMatrix()
+            self._translate = Translate()
+            self._rotate = Rotate(angle=self._screen_angle(angle), origin=(0, 0))
+            self._scale = Scale(x=self.SCALE_FACTOR, y=self.SCALE_FACTOR, z=1)
+            self._plume_group = InstructionGroup()
+            PopMatrix()
+        self.set_plume(contours, angle, lod)
+        # Only the transform follows the widget; the geometry is never rebuilt for this.
+        self.bind(pos=self.draw_plume, size=self.draw_plume)
+        self.draw_plume()
+
+    @staticmethod
+    def _screen_angle(angle):
+        """
+        Kivy rotation (degrees counter-clockwise) for a wind angle in degrees clockwise
+        from north: the contours' downwind x-axis points east when unrotated, so 'E' (90)
+        needs no rotation and 'N' (0) a quarter turn.
+        """
+        return 90 - angle
 
     def triangulate_polygon(self, points):
         """
-        Simple triangulation for convex polygons (fan triangulation from first vertex)
-        Returns vertices and indices for Mesh rendering
+        Triangulates a (possibly non-convex) polygon for Mesh rendering.
+        Returns vertices [x, y, u, v, ...] and triangle indices as lists.
         """
-        if len(points) < 3:
-            return [], []
-        
-        # Convert to vertices format [x, y, u, v, x2, y2, u2, v2, ...]
-        vertices = []
-        for i, (x, y) in enumerate(points):
-            # u, v are texture coordinates (we'll use 0,0 for solid colors)
-            vertices.extend([x, y, 0, 0])
-        
-        # Create triangle indices (fan triangulation)
-        indices = []
-        for i in range(1, len(points) - 1):
-            indices.extend([0, i, i + 1])  # Triangle from vertex 0 to consecutive vertices
-        
+        from plume_geometry import contour_buffers
+        vertices, indices, _ = contour_buffers(points)
         return vertices, indices
 
-    def draw_plume(self, *args):
-        self.canvas.clear()
-        
-        # Scaling factor to make the plume visible (miles -> pixels)
-        SCALE_FACTOR = 2.0 
-        
-        center_x = self.width / 2
-        center_y = self.height / 2
-        
-        with self.canvas:
-            PushMatrix()
-            # Rotate the entire canvas around the center point
-            Rotate(angle=self.angle, origin=(center_x, center_y))
-            
-            # Draw the contours from highest dose to lowest
-            sorted_dose_keys = sorted(self.contours.keys(), key=lambda x: int(x.split('_')[0]), reverse=True)
-            
-            for dose_key in sorted_dose_keys:
-                points = self.contours[dose_key]
+    def set_plume(self, contours, angle, lod=None):
+        """
+        Replaces the result being drawn. Its LOD tiers are simplified once here, unless a
+        ContourLOD for these contours was already built (e.g. on the worker thread).
+        """
+        self.stop_animation()
+        self.contours = contours
+        self.angle = angle
+        self._rotate.angle = self._screen_angle(angle)
+        if lod is None:
+            from plume_geometry import ContourLOD
+            with span('render.lod'):
+                lod = ContourLOD(contours)
+        self._lod = lod
+        self._tier = None
+        self._build_geometry()
+
+    def set_scale(self, pixels_per_mile):
+        """Zooms the plume; geometry is only rebuilt when a different LOD tier is needed."""
+        self.pixels_per_mile = pixels_per_mile
+        self._scale.x = self._scale.y = pixels_per_mile
+        self._build_geometry()
+
+    def _build_geometry(self):
+        """Builds the Mesh and Line instructions for the LOD tier of the current scale."""
+        tier = self._lod.tier_for_scale(self.pixels_per_mile)
+        if tier == self._tier or self._animation_event is not None:
+            return
+        with span('render.geometry', tier=tier):
+            self._build_tier(tier)
+
+    def _build_tier(self, tier):
+        from plume_geometry import contour_buffers
+        self._tier = tier
+        contours = self._lod.tiers[tier]
+        self._plume_group.clear()
+
+        # Draw the contours from highest dose to lowest
+        sorted_dose_keys = sorted(contours.keys(), key=lambda x: int(x.split('_')[0]), reverse=True)
+
+        for dose_key in sorted_dose_keys:
+            color = self.dose_colors.get(dose_key, (1, 1, 1, 0.3))
+            # Multi-burst fields give a list of polygons per dose level.
+            polygons = contours[dose_key]
+            if not isinstance(polygons, list):
+                polygons = [polygons]
+
+            for points in polygons:
                 if len(points) < 3:  # Need at least 3 points for a polygon
                     continue
-                    
-                color = self.dose_colors.get(dose_key, (1, 1, 1, 0.3))
-                Color(*color)
-                
-                # Scale and translate points
-                scaled_points = []
-                for x, y in points:
-                    scaled_x = x * SCALE_FACTOR + center_x
-                    scaled_y = y * SCALE_FACTOR + center_y
-                    scaled_points.append((scaled_x, scaled_y))
+                vertices, indices, outline_points = contour_buffers(points)
 
                 # Create filled polygon using Mesh
-                vertices, indices = self.triangulate_polygon(scaled_points)
+                self._plume_group.add(Color(*color))
                 if vertices and indices:
-                    Mesh(vertices=vertices, indices=indices, mode='triangles')
-                
-                # Draw outline for better visibility
-                outline_points = []
-                for x, y in scaled_points:
-                    outline_points.extend([x, y])
-                
-                # Draw a darker outline
-                Color(color[0] * 0.7, color[1] * 0.7, color[2] * 0.7, color[3])
-                Line(points=outline_points, width=1, close=True)
-            
-            PopMatrix()
+                    self._plume_group.add(Mesh(vertices=vertices, indices=indices, mode='triangles'))
+
+                # Draw a darker outline for better visibility
+                self._plume_group.add(Color(color[0] * 0.7, color[1] * 0.7, color[2] * 0.7, color[3]))
+                self._plume_group.add(Line(points=outline_points, width=1, close=True))
+
+    def play_animation(self, animation):
+        """
+        Plays a FalloutAnimation. Its slab meshes are built once, each behind its own
+        Color instruction; every frame only assigns those colours.
+        """
+        self.stop_animation()
+        self._plume_group.clear()
+        self._tier = None
+        self._animation_colors = []
+        for vertices, indices in animation.meshes:
+            color = Color(0, 0, 0, 0)
+            self._animation_colors.append(color)
+            self._plume_group.add(color)
+            self._plume_group.add(Mesh(vertices=vertices.ravel().tolist(), indices=indices.tolist(),
+                                       mode='triangles'))
+        self._animation_frames = animation.frames()
+        self._animation_event = Clock.schedule_interval(self._next_animation_frame, 1.0 / animation.fps)
+
+    def _next_animation_frame(self, dt):
+        frame = next(self._animation_frames, None)
+        if frame is None:
+            self.stop_animation()
+            return False
+        _, rgba = frame
+        for color, value in zip(self._animation_colors, rgba.tolist()):
+            color.rgba = value
 
+    def stop_animation(self):
+        """Stops playback and restores the static contours."""
+        if self._animation_event is None:
+            return
+        self._animation_event.cancel()
+        self._animation_event = None
+        self._animation_colors = []
+        self._build_geometry()
+
+    def set_origin(self, origin):
+        """Pins ground zero to a position (e.g. its map location); None means the centre."""
+        self.origin = origin
+        self.draw_plume()
+
+    def draw_plume(self, *args):
+        # Ground zero sits at the origin (the widget centre by default); rotation and
+        # scaling happen around it.
+        self._translate.xy = self.origin if self.origin is not None else self.center
 
 class NuclearApp(App):
     def build(self):
+        with startup.phase('build'):
+            return self._build_layout()
+
+    def _build_layout(self):
+        # Plume results persist between launches; the cache is opened on first use.
+        self.plume_cache = None
+
         self.main_layout = BoxLayout(orientation='horizontal')
         
         # Left-side layout for map and plume
         self.map_area = RelativeLayout(size_hint_x=0.7)
         
-        # Static map image (fallback to colored background if image not available)
-        try:
-            self.map_image = KivyImage(source='assets/delhi_map.webp', allow_stretch=True, keep_ratio=False)
-            self.map_area.add_widget(self.map_image)
-        except:
-            # Fallback background if map image is not available
-            with self.map_area.canvas.before:
-                Color(0.2, 0.2, 0.2)
-                self.map_rect = Rectangle(size=self.map_area.size, pos=self.map_area.pos)
-            self.map_area.bind(size=self._update_rect, pos=self._update_rect)
+        # Offline tile map when a tiles/ folder is present, otherwise the static map image
+        if os.path.isdir('tiles'):
+            self.map_view = OfflineMap()
+            self.map_view.on_view_change = self._sync_plume_to_map
+            self.map_area.add_widget(self.map_view)
+        else:
+            # Static map image (fallback to colored background if image not available)
+            try:
+                self.map_image = KivyImage(source='assets/delhi_map.webp', allow_stretch=True, keep_ratio=False)
+                self.map_area.add_widget(self.map_image)
+            except:
+                # Fallback background if map image is not available
+                with self.map_area.canvas.before:
+                    Color(0.2, 0.2, 0.2)
+                    self.map_rect = Rectangle(size=self.map_area.size, pos=self.map_area.pos)
+                self.map_area.bind(size=self._update_rect, pos=self._update_rect)
         
-        # Transparent layer for drawing the plume on top
-        self.plume_drawing_layer = Widget()
+        # Transparent layer for drawing the plume on top; as a layout it keeps the
+        # plume widget sized to the map area.
+        self.plume_drawing_layer = RelativeLayout()
         self.map_area.add_widget(self.plume_drawing_layer)
 
+        # With NUCLEAR_TRACE=1, the latest stage timings are shown over the map.
+        if instrumentation.ENABLED:
+            self.trace_overlay = Label(text='', font_name='RobotoMono-Regular', font_size='11sp',
+                                       halign='left', valign='top', color=(1, 1, 1, 0.9),
+                                       size_hint=(1, 1), padding=(8, 8))
+            self.trace_overlay.bind(size=lambda label, size: setattr(label, 'text_size', size))
+            self.map_area.add_widget(self.trace_overlay)
+            Clock.schedule_interval(self._update_trace_overlay, 0.5)
+
         # Controls panel on the right
         self.controls = GridLayout(cols=1, spacing=10, padding=10, size_hint_x=0.3)
         self.controls.add_widget(Label(text='Nuclear Fallout Simulator', size_hint_y=None, height=40, font_size='20sp'))
@@ -148,6 +288,7 @@ class NuclearApp(App):
         self.location_input_layout.add_widget(self.lat_input)
         self.location_input_layout.add_widget(self.lon_input)
         self.controls.add_widget(self.location_input_layout)
+        self._center_map()
         
         self.controls.add_widget(Label(text='Yield (kilotons):', size_hint_y=None, height=30))
         self.yield_input = TextInput(text='150', multiline=False, size_hint_y=None, height=30)
@@ -168,96 +309,231 @@ class NuclearApp(App):
         self.detonate_button.bind(on_press=self.run_simulation)
         self.controls.add_widget(self.detonate_button)
         
+        # Multi-burst scenarios: each "Add Burst" adds the inputs above, detonating
+        # `time` hours after the first burst, and redraws the combined field.
+        self.bursts = []
+        self.burst_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=40, spacing=5)
+        self.burst_time_input = TextInput(text='0', hint_text='Time (h)', multiline=False, size_hint_x=0.3)
+        self.add_burst_button = Button(text='Add Burst')
+        self.add_burst_button.bind(on_press=self.add_burst)
+        self.clear_bursts_button = Button(text='Clear', size_hint_x=0.5)
+        self.clear_bursts_button.bind(on_press=self.clear_bursts)
+        self.burst_layout.add_widget(self.burst_time_input)
+        self.burst_layout.add_widget(self.add_burst_button)
+        self.burst_layout.add_widget(self.clear_bursts_button)
+        self.controls.add_widget(self.burst_layout)
+
+        self.animate_button = Button(text='Animate Arrival', size_hint_y=None, height=50)
+        self.animate_button.bind(on_press=self.animate_fallout)
+        self.controls.add_widget(self.animate_button)
+
         self.show_graph_button = Button(text='Show Dose Graph', size_hint_y=None, height=50)
         self.show_graph_button.bind(on_press=self.show_dose_graph)
         self.controls.add_widget(self.show_graph_button)
 
         self.main_layout.add_widget(self.map_area)
         self.main_layout.add_widget(self.controls)
+
+        # Calculations run on a background worker; edits to the inputs redraw the plume
+        # once they settle instead of on every keystroke.
+        self.worker = SimulationWorker()
+        self._graph_textures = {}
+        # Set by a Simulate press and cleared by Add Burst/Clear, so edits only redraw a
+        # plume the user asked for.
+        self.live_updates = False
+        self._live_update = debounce(self._on_input_changed, delay=0.25)
+        for widget in (self.yield_input, self.wind_speed_input, self.wind_direction_spinner):
+            widget.bind(text=self._live_update)
         
         return self.main_layout
 
+    def on_start(self):
+        Clock.schedule_once(self._on_first_frame, 0)
+
+    def _on_first_frame(self, dt):
+        startup.mark('first frame')
+        if REPORT_ENABLED or startup.over_budget():
+            print(startup.report())
+        # Load the heavy modules in the background now that the window is up.
+        self.worker.submit('warmup', _warm_up, on_result=self._on_warmed_up)
+
+    def _on_warmed_up(self, _):
+        if REPORT_ENABLED:
+            print(startup.report())
+
+    def _update_trace_overlay(self, dt):
+        self.trace_overlay.text = instrumentation.recorder.report()
+
+    def on_stop(self):
+        self.worker.shutdown()
+        instrumentation.recorder.close()
+        if self.plume_cache is not None:
+            self.plume_cache.save()
+
+    def _calculate_plume(self, *args, **kwargs):
+        """Runs on the worker thread: opens the plume cache if needed and calculates."""
+        from plume_cache import PlumeCache, cached_calculate_full_plume
+        if self.plume_cache is None:
+            # Plume results persist between launches so repeated scenarios are instant.
+            self.plume_cache = PlumeCache(persist_path=os.path.join(self.user_data_dir, 'plume_cache.pkl'))
+        with span('plume.total'):
+            return cached_calculate_full_plume(*args, cache=self.plume_cache, **kwargs)
+
+    def _center_map(self):
+        """Centres the tile map (if any) on the ground-zero location inputs."""
+        if not hasattr(self, 'map_view'):
+            return
+        try:
+            self.map_view.set_view(lat=float(self.lat_input.text), lon=float(self.lon_input.text))
+        except ValueError:
+            pass
+
+    def _sync_plume_to_map(self):
+        """Keeps the plume on its ground zero and at the map's scale while panning/zooming."""
+        if not hasattr(self, 'plume_widget') or getattr(self, 'ground_zero', None) is None:
+            return
+        self.plume_widget.set_scale(self.map_view.pixels_per_mile())
+        self.plume_widget.set_origin(self.map_view.latlon_to_pixel(*self.ground_zero))
+
     def _update_rect(self, instance, value):
         """Update background rectangle when map area changes (fallback method)"""
         if hasattr(self, 'map_rect'):
             self.map_rect.pos = instance.pos
             self.map_rect.size = instance.size
 
-    def run_simulation(self, instance):
+    def _on_input_changed(self):
+        # Live updates only follow a simulated single plume; invalid partial input is ignored.
+        if self.live_updates and not self.bursts:
+            self.run_simulation(None, live=True)
+
+    def _report_error(self, error):
+        print(f"An error occurred: {error}")
+
+    def run_simulation(self, instance, live=False):
         try:
             yield_kt = float(self.yield_input.text)
             wind_speed = float(self.wind_speed_input.text)
-            wind_direction = self.wind_direction_spinner.text
-
-            # Call the backend function
-            plume_data = calculate_full_plume(yield_kt, wind_speed, wind_direction)
-            
-            # Clear any previous plume drawing
-            self.plume_drawing_layer.clear_widgets()
-            
-            # Remove the old plume widget if it exists
-            if hasattr(self, 'plume_widget'):
-                self.plume_drawing_layer.remove_widget(self.plume_widget)
-            
+        except ValueError:
+            if not live:
+                _show_message('Input Error', 'Please enter valid numbers for yield and wind speed.')
+            return
+        wind_direction = self.wind_direction_spinner.text
+        if not live:
+            self.bursts = []
+            self.live_updates = True
+            self._center_map()
+            try:
+                self.ground_zero = (float(self.lat_input.text), float(self.lon_input.text))
+            except ValueError:
+                self.ground_zero = None
+
+        # Call the backend function on the worker thread; a newer request supersedes this one.
+        self.worker.submit('plume', self._calculate_plume, yield_kt, wind_speed, wind_direction,
+                           sampling='adaptive',
+                           on_result=lambda plume_data: self._show_plume(plume_data, wind_speed_kph=wind_speed),
+                           on_error=self._report_error)
+
+    def add_burst(self, instance):
+        from multi_burst import Burst
+        try:
+            burst = Burst(float(self.lat_input.text), float(self.lon_input.text), float(self.yield_input.text),
+                          float(self.wind_speed_input.text), self.wind_direction_spinner.text,
+                          time_hours=float(self.burst_time_input.text or 0))
+        except ValueError:
+            _show_message('Input Error', 'Please enter valid numbers for location, yield, wind speed and time.')
+            return
+        self.bursts.append(burst)
+        self.live_updates = False
+        # The combined field is anchored at the first burst's ground zero.
+        self.ground_zero = (self.bursts[0].lat, self.bursts[0].lon)
+        self.worker.submit('plume', _calculate_bursts, list(self.bursts),
+                           on_result=self._show_bursts, on_error=self._report_error)
+
+    def clear_bursts(self, instance):
+        self.bursts = []
+        self.plume_wind_kph = None
+        self.live_updates = False
+        self.ground_zero = None
+        self.worker.cancel('plume')
+        if hasattr(self, 'plume_widget'):
+            self.plume_widget.set_plume({}, 90)
+
+    def _show_bursts(self, result):
+        # Combined contours are already in east/north miles: x east is the wind angle 90 (E),
+        # which is drawn unrotated.
+        self.worker.cancel('animation')
+        self._show_plume({'contours': result['contours'], 'angle': 90, 'lod': result['lod']})
+
+    def animate_fallout(self, instance):
+        # Animation follows the single plume on screen, using the wind it was computed with.
+        if getattr(self, 'plume_wind_kph', None) is None:
+            _show_message('Animation', 'Simulate a single burst first.')
+            return
+        self.worker.submit('animation', _build_animation, self.plume_widget.contours, self.plume_wind_kph,
+                           self.plume_widget.dose_colors,
+                           on_result=self.plume_widget.play_animation, on_error=self._report_error)
+
+    def _show_plume(self, plume_data, wind_speed_kph=None):
+        self.plume_wind_kph = wind_speed_kph
+        # Reuse the existing drawing widget; only its geometry is replaced
+        if hasattr(self, 'plume_widget'):
+            self.worker.cancel('animation')
+            self.plume_widget.set_plume(plume_data['contours'], plume_data['angle'], plume_data.get('lod'))
+        else:
             # Create an instance of our new drawing widget
             # Pass the contours and angle from the plume_data dictionary
             self.plume_widget = PlumeDrawingWidget(
                 contours=plume_data['contours'], 
-                angle=plume_data['angle']
+                angle=plume_data['angle'],
+                lod=plume_data.get('lod')
             )
             self.plume_drawing_layer.add_widget(self.plume_widget)
-
-        except ValueError:
-            popup = Popup(title='Input Error',
-                          content=Label(text='Please enter valid numbers for yield and wind speed.'),
-                          size_hint=(None, None), size=(400, 200))
-            popup.open()
-        except Exception as e:
-            print(f"An error occurred: {e}")
+        if hasattr(self, 'map_view'):
+            self._sync_plume_to_map()
 
     def show_dose_graph(self, instance):
         try:
             yield_kt = float(self.yield_input.text)
-            
-            # Calculate a location-specific initial dose rate
-            initial_dose_rate = calculate_initial_dose_rate(yield_kt)
-
-            # 1. Generate the data points
-            time_points, dose_data = generate_dose_data(initial_dose_rate)
-            
-            # 2. Create the Matplotlib plot
-            plt.style.use('dark_background')
-            plt.figure(figsize=(6, 4))
-            plt.plot(time_points, dose_data, color='cyan')
-            plt.title('Dose Rate vs. Time', color='white')
-            plt.xlabel('Time (hours)', color='white')
-            plt.ylabel('Dose Rate (rad/hr)', color='white')
-            plt.grid(True, linestyle='--', alpha=0.6)
-            
-            # 3. Save the plot to a temporary file
-            plot_path = os.path.join(os.getcwd(), 'dose_graph.png')
-            plt.savefig(plot_path, transparent=True)
-            plt.close()
-            
-            # 4. Display the image in a Popup
-            content = BoxLayout(orientation='vertical')
-            graph_image = KivyImage(source=plot_path, reload=True, nocache=True, allow_stretch=True, keep_ratio=True)
-            close_button = Button(text='Close', size_hint_y=None, height=50)
-            
-            content.add_widget(graph_image)
-            content.add_widget(close_button)
-            
-            popup = Popup(title='Dose Rate Graph', content=content, size_hint=(0.8, 0.8), auto_dismiss=False)
-            close_button.bind(on_press=popup.dismiss)
-            popup.open()
-            
         except ValueError:
-            popup = Popup(title='Input Error',
-                          content=Label(text='Please enter a valid number for yield.'),
-                          size_hint=(None, None), size=(400, 200))
-            popup.open()
-        except Exception as e:
-            print(f"Could not generate graph: {e}")
+            _show_message('Input Error', 'Please enter a valid number for yield.')
+            return
+
+        # Reopening a graph reuses its texture; otherwise render it on the worker thread.
+        texture = self._graph_textures.get(yield_kt)
+        if texture is not None:
+            self._show_graph_popup(texture)
+            return
+        self.worker.submit('graph', _render_graph, yield_kt,
+                           on_result=lambda rendered: self._show_graph_popup(self._graph_texture(yield_kt, rendered)),
+                           on_error=lambda e: print(f"Could not generate graph: {e}"))
+
+    def _graph_texture(self, yield_kt, rendered):
+        """Uploads an RGBA graph buffer straight into a Kivy texture (no image file)."""
+        from kivy.graphics.texture import Texture
+        data, size = rendered
+        with span('graph.texture'):
+            texture = Texture.create(size=size, colorfmt='rgba')
+            texture.blit_buffer(data, colorfmt='rgba', bufferfmt='ubyte')
+            # matplotlib rows run top to bottom; Kivy textures start at the bottom.
+            texture.flip_vertical()
+        if len(self._graph_textures) >= 32:
+            self._graph_textures.pop(next(iter(self._graph_textures)))
+        self._graph_textures[yield_kt] = texture
+        return texture
+
+    def _show_graph_popup(self, texture):
+        from kivy.uix.popup import Popup
+        # Display the graph in a Popup
+        content = BoxLayout(orientation='vertical')
+        graph_image = KivyImage(texture=texture, fit_mode='contain')
+        close_button = Button(text='Close', size_hint_y=None, height=50)
+        
+        content.add_widget(graph_image)
+        content.add_widget(close_button)
+        
+        popup = Popup(title='Dose Rate Graph', content=content, size_hint=(0.8, 0.8), auto_dismiss=False)
+        close_button.bind(on_press=popup.dismiss)
+        popup.open()
 
 if __name__ == '__main__':
     NuclearApp().run()
\ No newline at end of file
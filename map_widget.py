@@ -1,40 +1,298 @@
 # map_widget.py
+import os
+import queue
+import threading
+from collections import OrderedDict, deque
+
 from kivy.uix.widget import Widget
 from kivy.graphics import Color, Rectangle
-from kivy.core.image import Image as CoreImage
+from kivy.core.image import ImageLoader
+from kivy.clock import Clock
 from kivy.lang import Builder
-from math import log, pi, tan, atan, exp
+from instrumentation import span
+from math import log, pi, tan, atan, exp, floor, cos, radians
 
 # Builder.load_string(your_kv_string) # Use this if you are using a KV file
 
+TILE_SIZE = 256  # Pixels per tile edge in the standard z/x/y scheme
+MIN_ZOOM = 1
+MAX_ZOOM = 18
+
+# --- Web Mercator Helpers ---
+
+def latlon_to_tile(lat, lon, zoom):
+    """Fractional tile coordinates (x, y) of a lat/lon at a zoom level."""
+    n = 2 ** zoom
+    x = (lon + 180.0) / 360.0 * n
+    y = (1.0 - log(tan(pi / 4 + radians(lat) / 2)) / pi) / 2.0 * n
+    return x, y
+
+def tile_to_latlon(x, y, zoom):
+    """Inverse of latlon_to_tile."""
+    n = 2 ** zoom
+    lon = x / n * 360.0 - 180.0
+    lat = (2 * atan(exp(pi * (1 - 2 * y / n))) - pi / 2) * 180.0 / pi
+    return lat, lon
+
+class TileTextureCache:
+    """A bounded LRU of decoded tile textures, keyed by (zoom, x, y)."""
+
+    def __init__(self, max_tiles=192):
+        self.max_tiles = max_tiles
+        self._textures = OrderedDict()
+
+    def get(self, key):
+        texture = self._textures.get(key)
+        if texture is not None:
+            self._textures.move_to_end(key)
+        return texture
+
+    def put(self, key, texture):
+        self._textures[key] = texture
+        self._textures.move_to_end(key)
+        while len(self._textures) > self.max_tiles:
+            self._textures.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self._textures
+
+class TileLoader:
+    """
+    Reads and decodes tile files on a background thread, newest requests first. Only
+    the texture upload is left for the main thread, where OpenGL objects must be made:
+    decoded images are handed to `on_loaded(key, image)` there, at most
+    `uploads_per_frame` per frame so a burst of arrivals cannot stall the UI.
+    `image` is None for a tile that is missing or cannot be decoded.
+    """
+
+    def __init__(self, tiles_path, on_loaded, extensions=('png', 'jpg', 'jpeg', 'webp'), uploads_per_frame=4):
+        self.tiles_path = tiles_path
+        self.extensions = extensions
+        self.on_loaded = on_loaded
+        self.uploads_per_frame = uploads_per_frame
+        self._queue = queue.LifoQueue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._ready = deque()
+        # A small positive timeout keeps the next batch for the next frame.
+        self._deliver_trigger = Clock.create_trigger(self._deliver, 1 / 120.0)
+        self._thread = threading.Thread(target=self._work, name='tile-loader', daemon=True)
+        self._thread.start()
+
+    def request(self, key):
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        self._queue.put(key)
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _find_file(self, key):
+        zoom, x, y = key
+        for ext in self.extensions:
+            path = os.path.join(self.tiles_path, str(zoom), str(x), f'{y}.{ext}')
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _work(self):
+        while True:
+            key = self._queue.get()
+            path = self._find_file(key)
+            image = None
+            if path is not None:
+                try:
+                    # Decodes to pixels only; the texture is created on first .texture access.
+                    image = ImageLoader.load(path, nocache=True)
+                except Exception as e:
+                    print(f"Could not decode tile {path}: {e}")
+            self._ready.append((key, image))
+            self._deliver_trigger()
+
+    def _deliver(self, dt):
+        for _ in range(min(self.uploads_per_frame, len(self._ready))):
+            key, image = self._ready.popleft()
+            with self._lock:
+                self._pending.discard(key)
+            self.on_loaded(key, image)
+        if self._ready:
+            self._deliver_trigger()
+
 class OfflineMap(Widget):
+    """
+    An offline slippy map drawing z/x/y tiles from `tiles_path`.
+
+    Only tiles intersecting the widget are drawn. Decoded textures live in a bounded LRU,
+    and while panning the ring of tiles around the view plus the adjacent zoom levels are
+    prefetched in the background, so the next frames rarely wait on the disk. Missing
+    tiles fall back to a scaled-up parent tile when one is cached.
+    """
+    # Neighbouring tiles fetched around the visible area, and the maximum prefetch backlog.
+    PREFETCH_MARGIN = 1
+    MAX_PENDING = 64
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.zoom = 10 # Initial zoom level
         self.lat = 28.6139 # Initial latitude for Delhi
         self.lon = 77.2090 # Initial longitude for Delhi
         self.tiles_path = 'tiles' # Local folder for map tiles
-        
+
+        self.texture_cache = TileTextureCache()
+        self._missing = set()  # Tiles known not to exist on disk
+        self._loader = None
+        # Optional callable run after every pan or zoom, e.g. to move overlays with the map.
+        self.on_view_change = None
+
+        self._redraw_trigger = Clock.create_trigger(self.redraw)
         self.bind(pos=self.redraw, size=self.redraw)
-        
+
+    @property
+    def loader(self):
+        # Created lazily so tiles_path can be changed after construction.
+        if self._loader is None or self._loader.tiles_path != self.tiles_path:
+            self._loader = TileLoader(self.tiles_path, self._on_tile_loaded)
+        return self._loader
+
+    def set_view(self, lat=None, lon=None, zoom=None):
+        if lat is not None:
+            self.lat = max(-85.0511, min(85.0511, lat))
+        if lon is not None:
+            self.lon = (lon + 180.0) % 360.0 - 180.0
+        if zoom is not None:
+            self.zoom = int(max(MIN_ZOOM, min(MAX_ZOOM, zoom)))
+        self.redraw()
+        if self.on_view_change is not None:
+            self.on_view_change()
+
+    # --- Geometry ---
+
+    def _center_tile(self):
+        return latlon_to_tile(self.lat, self.lon, self.zoom)
+
+    def latlon_to_pixel(self, lat, lon):
+        """Window position of a lat/lon in the current view."""
+        cx, cy = self._center_tile()
+        tx, ty = latlon_to_tile(lat, lon, self.zoom)
+        return (self.center_x + (tx - cx) * TILE_SIZE,
+                self.center_y - (ty - cy) * TILE_SIZE)
+
+    def pixels_per_mile(self):
+        """Map scale at the view centre, for overlays drawn in miles."""
+        meters_per_pixel = 156543.03392 * cos(radians(self.lat)) / (2 ** self.zoom)
+        return 1609.344 / meters_per_pixel
+
+    def _visible_range(self, margin=0):
+        cx, cy = self._center_tile()
+        half_w = self.width / 2.0 / TILE_SIZE
+        half_h = self.height / 2.0 / TILE_SIZE
+        return (int(floor(cx - half_w)) - margin, int(floor(cx + half_w)) + margin,
+                int(floor(cy - half_h)) - margin, int(floor(cy + half_h)) + margin)
+
+    # --- Tile Loading ---
+
+    def _request(self, key):
+        n = 2 ** key[0]
+        if not (0 <= key[2] < n) or key in self.texture_cache or key in self._missing:
+            return
+        self.loader.request(key)
+
+    def _on_tile_loaded(self, key, image):
+        if image is None:
+            self._missing.add(key)
+            return
+        # Uploads the already decoded pixels.
+        self.texture_cache.put(key, image.texture)
+        if key[0] == self.zoom:
+            # Tiles arriving in the same frame share one redraw.
+            self._redraw_trigger()
+
+    def _prefetch(self):
+        """Queues the ring around the view and the same area at the adjacent zoom levels."""
+        if self.loader.pending_count() > self.MAX_PENDING:
+            return
+        x0, x1, y0, y1 = self._visible_range(margin=self.PREFETCH_MARGIN)
+        n = 2 ** self.zoom
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                self._request((self.zoom, x % n, y))
+        if self.zoom > MIN_ZOOM:
+            for x in range(x0 // 2, x1 // 2 + 1):
+                for y in range(y0 // 2, y1 // 2 + 1):
+                    self._request((self.zoom - 1, x % (n // 2), y))
+        if self.zoom < MAX_ZOOM:
+            vx0, vx1, vy0, vy1 = self._visible_range()
+            for x in range(2 * vx0, 2 * vx1 + 2):
+                for y in range(2 * vy0, 2 * vy1 + 2):
+                    self._request((self.zoom + 1, x % (2 * n), y))
+
+    def _fallback_texture(self, zoom, x, y):
+        """A cached ancestor tile and the sub-rectangle of it covering (zoom, x, y)."""
+        for levels_up in range(1, 4):
+            if zoom - levels_up < MIN_ZOOM:
+                break
+            factor = 2 ** levels_up
+            parent = (zoom - levels_up, x // factor, y // factor)
+            texture = self.texture_cache.get(parent)
+            if texture is not None:
+                size = TILE_SIZE // factor
+                # Texture rows run bottom-up while tile y runs top-down.
+                u = (x % factor) * size
+                v = (factor - 1 - y % factor) * size
+                return texture.get_region(u, v, size, size)
+        return None
+
     def redraw(self, *args):
+        with span('map.redraw', zoom=self.zoom):
+            self._redraw()
+
+    def _redraw(self):
         self.canvas.clear()
+        cx, cy = self._center_tile()
+        x0, x1, y0, y1 = self._visible_range()
+        n = 2 ** self.zoom
         with self.canvas:
             # Logic to draw the map tiles
-            pass
+            Color(1, 1, 1, 1)
+            for x in range(x0, x1 + 1):
+                for y in range(y0, y1 + 1):
+                    if not 0 <= y < n:
+                        continue
+                    key = (self.zoom, x % n, y)
+                    texture = self.texture_cache.get(key)
+                    if texture is None:
+                        self._request(key)
+                        texture = self._fallback_texture(*key)
+                        if texture is None:
+                            continue
+                    px = self.center_x + (x - cx) * TILE_SIZE
+                    py = self.center_y - (y + 1 - cy) * TILE_SIZE
+                    Rectangle(texture=texture, pos=(px, py), size=(TILE_SIZE, TILE_SIZE))
+        self._prefetch()
 
     # Method to handle panning
     def on_touch_down(self, touch):
         if self.collide_point(*touch.pos):
+            # Mouse wheel zooms around the view centre.
+            if touch.is_mouse_scrolling:
+                step = 1 if touch.button == 'scrolldown' else -1
+                self.set_view(zoom=self.zoom + step)
+                return True
             touch.grab(self)
             return True
 
     def on_touch_move(self, touch):
         if touch.grab_current is self:
-            # Logic to move the map
-            pass
+            # Move the map: shift the centre tile coordinates by the drag in pixels.
+            cx, cy = self._center_tile()
+            lat, lon = tile_to_latlon(cx - touch.dx / TILE_SIZE, cy + touch.dy / TILE_SIZE, self.zoom)
+            self.set_view(lat=lat, lon=lon)
+            return True
 
     def on_touch_up(self, touch):
         if touch.grab_current is self:
             touch.ungrab(self)
-            return True
\ No newline at end of file
+            return True
@@ -0,0 +1,229 @@
+# monte_carlo.py
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from dose_raster import DoseRaster, local_to_plume_frame
+from plume_model import DEFAULT_DOSE_LEVELS, MPH_PER_KPH, _direction_angle, _dose_field
+from task_pool import run_bounded
+
+# Every uncertain input is described by a tuple (kind, *parameters):
+#   ('fixed', value)
+#   ('uniform', low, high)
+#   ('normal', mean, std)          - clipped at zero for physical quantities
+#   ('lognormal', median, sigma)   - sigma of the underlying normal
+#   ('vonmises', mean_deg, kappa)  - wind direction only; continuous angle in degrees
+DEFAULT_DISTRIBUTIONS = {
+    'yield_kt': ('fixed', 100.0),
+    'wind_speed_kph': ('fixed', 24.0),
+    'wind_direction': ('fixed', 90.0),
+    'fission_fraction': ('fixed', 0.5),
+}
+
+# Members evaluated by one worker task; also fixes how the random streams are split.
+MEMBERS_PER_TASK = 4096
+
+# Histogram used for streaming percentiles: log-spaced dose-rate bins (rad/hr).
+HISTOGRAM_EDGES = np.logspace(-2, 5, num=7 * 8 + 1)
+
+def _sample(spec, n, rng):
+    kind, *params = spec
+    if kind == 'fixed':
+        return np.full(n, float(params[0]))
+    if kind == 'uniform':
+        return rng.uniform(params[0], params[1], n)
+    if kind == 'normal':
+        return rng.normal(params[0], params[1], n)
+    if kind == 'lognormal':
+        return params[0] * np.exp(rng.normal(0.0, params[1], n))
+    if kind == 'vonmises':
+        return np.degrees(rng.vonmises(np.radians(params[0]), params[1], n))
+    raise ValueError(f"Unknown distribution: {kind!r}")
+
+def sample_inputs(distributions, n, rng):
+    """Draws n members; wind direction is a continuous angle, never snapped to compass points."""
+    specs = dict(DEFAULT_DISTRIBUTIONS, **distributions)
+    direction = specs['wind_direction']
+    if direction[0] == 'fixed':
+        direction = ('fixed', _direction_angle(direction[1]))
+    return {
+        'yield_kt': np.maximum(_sample(specs['yield_kt'], n, rng), 1e-3),
+        'wind_speed_mph': np.maximum(_sample(specs['wind_speed_kph'], n, rng), 0.1) * MPH_PER_KPH,
+        'angle': np.mod(_sample(direction, n, rng), 360.0),
+        'fission_fraction': np.clip(_sample(specs['fission_fraction'], n, rng), 0.0, 1.0),
+    }
+
+class EnsembleAccumulator:
+    """
+    Streaming statistics of dose-rate maps over ensemble members.
+
+    Keeps per-cell exceedance counts for each threshold, a running sum for the mean and
+    a log-binned histogram for percentiles. Memory depends on the grid only, never on
+    the number of members, and accumulators from different workers merge by addition.
+    """
+
+    def __init__(self, n_cells, thresholds, edges=HISTOGRAM_EDGES):
+        self.n_cells = n_cells
+        self.thresholds = np.asarray(sorted(thresholds), dtype=float)
+        self.edges = np.asarray(edges, dtype=float)
+        self.n_members = 0
+        self.exceedance_counts = np.zeros((len(self.thresholds), n_cells), dtype=np.uint32)
+        self.dose_sum = np.zeros(n_cells)
+        # Row i counts doses in [edges[i], edges[i + 1]); the last row is everything above
+        # edges[-1]. Doses below edges[0] (including zero) are implied by n_members.
+        self.histogram = np.zeros((len(self.edges), n_cells), dtype=np.uint32)
+
+    def add(self, n_members, cells, doses):
+        """
+        Adds a batch of n_members maps given sparsely: `doses` at flat `cells` indices,
+        with every cell not listed at zero for that member. Cells may repeat.
+        """
+        self.n_members += n_members
+        for i, threshold in enumerate(self.thresholds):
+            self.exceedance_counts[i] += np.bincount(cells[doses >= threshold], minlength=self.n_cells).astype(np.uint32)
+        self.dose_sum += np.bincount(cells, weights=doses, minlength=self.n_cells)
+        bins = np.searchsorted(self.edges, doses, side='right') - 1
+        counted = bins >= 0
+        flat = bins[counted] * self.n_cells + cells[counted]
+        self.histogram += np.bincount(flat, minlength=self.histogram.size).reshape(self.histogram.shape).astype(np.uint32)
+
+    def merge(self, other):
+        self.n_members += other.n_members
+        self.exceedance_counts += other.exceedance_counts
+        self.dose_sum += other.dose_sum
+        self.histogram += other.histogram
+        return self
+
+    def exceedance_probability(self, threshold):
+        i = int(np.searchsorted(self.thresholds, threshold))
+        if i >= len(self.thresholds) or self.thresholds[i] != threshold:
+            raise ValueError(f"Threshold {threshold} was not accumulated; available: {self.thresholds.tolist()}")
+        return self.exceedance_counts[i] / max(self.n_members, 1)
+
+    def mean(self):
+        return self.dose_sum / max(self.n_members, 1)
+
+    def percentile(self, q):
+        """
+        Per-cell q-th percentile (0-100) from the histogram, interpolated geometrically
+        within the bin, so it is accurate to the bin width (8 bins per decade by
+        default). Cells where fewer than (100 - q)% of members reach edges[0] are 0.
+        """
+        target = q / 100.0 * self.n_members
+        underflow = self.n_members - self.histogram.sum(axis=0, dtype=np.int64)
+        cumulative = underflow + np.cumsum(self.histogram, axis=0, dtype=np.int64)
+        reached = cumulative >= target
+        b = np.argmax(reached, axis=0)
+        cells = np.arange(self.n_cells)
+        below = np.where(b > 0, cumulative[np.maximum(b - 1, 0), cells], underflow)
+        frac = np.clip((target - below) / np.maximum(self.histogram[b, cells], 1), 0.0, 1.0)
+        # The open-ended top bin is treated as one more bin of the same log width.
+        edges = np.append(self.edges, self.edges[-1] ** 2 / self.edges[-2])
+        values = edges[b] * (edges[b + 1] / edges[b]) ** frac
+        return np.where((underflow >= target) | ~reached.any(axis=0), 0.0, values)
+
+class EnsembleResult:
+    """Reduced ensemble on a north-up grid; every map is returned as a DoseRaster."""
+
+    def __init__(self, grid, accumulator):
+        self.grid = grid
+        self.accumulator = accumulator
+
+    @property
+    def n_members(self):
+        return self.accumulator.n_members
+
+    def _raster(self, values):
+        g = self.grid
+        return DoseRaster(values.reshape(g.shape), g.lat0, g.lon0, g.angle, g.cell_miles, g.x0, g.y0)
+
+    def exceedance_map(self, threshold):
+        """Probability (0-1) that the H+1 dose rate reaches `threshold` rad/hr."""
+        return self._raster(self.accumulator.exceedance_probability(threshold))
+
+    def percentile_map(self, q):
+        """q-th percentile H+1 dose rate (rad/hr)."""
+        return self._raster(self.accumulator.percentile(q))
+
+    def mean_map(self):
+        return self._raster(self.accumulator.mean())
+
+def ensemble_grid(lat, lon, extent_miles=50.0, cell_miles=0.25):
+    """An empty north-up DoseRaster covering +/- extent_miles around ground zero."""
+    n = 2 * int(np.ceil(extent_miles / cell_miles)) + 1
+    origin = -(n // 2) * cell_miles
+    # angle=90 makes the frame axes east (u) and north (v).
+    return DoseRaster(np.zeros((n, n), dtype=np.float32), lat, lon, 90.0, cell_miles, origin, origin)
+
+def _run_members(distributions, n_members, seed, grid, thresholds, batch_size):
+    """Evaluates n_members on the grid in vectorized batches and returns their accumulator."""
+    rng = np.random.default_rng(seed)
+    east, north = grid.cell_centers()
+    east, north = east.ravel(), north.ravel()
+    accumulator = EnsembleAccumulator(east.size, thresholds)
+
+    for start in range(0, n_members, batch_size):
+        n = min(batch_size, n_members - start)
+        members = sample_inputs(distributions, n, rng)
+        # Rotate every cell into every member's plume frame: (n, n_cells) arrays.
+        downwind, crosswind = local_to_plume_frame(east[None, :], north[None, :], members['angle'][:, None])
+        # Upwind cells get no fallout, so only the downwind half is evaluated.
+        member, cells = np.nonzero(downwind > 0)
+        doses = _dose_field(downwind[member, cells], crosswind[member, cells], members['yield_kt'][member],
+                            members['wind_speed_mph'][member], members['fission_fraction'][member])
+        keep = doses >= accumulator.edges[0]
+        accumulator.add(n, cells[keep], doses[keep])
+    return accumulator
+
+def run_ensemble(lat, lon, n_members, distributions, thresholds=DEFAULT_DOSE_LEVELS,
+                 extent_miles=50.0, cell_miles=0.25, batch_size=None, workers=None, seed=None,
+                 members_per_task=MEMBERS_PER_TASK):
+    """
+    Monte Carlo fallout ensemble.
+
+    Samples yield, wind speed (kph), continuous wind direction and fission fraction from
+    `distributions` (see DEFAULT_DISTRIBUTIONS), evaluates members in vectorized batches
+    on a shared north-up grid and reduces them as they are produced, so no member map is
+    kept. Members are split into fixed-size tasks, each with its own random stream
+    derived from `seed`, so results do not depend on `workers` (0 runs inline).
+    """
+    grid = ensemble_grid(lat, lon, extent_miles, cell_miles)
+    n_cells = grid.values.size
+    if batch_size is None:
+        # Keep each batch's working arrays around 4 million elements.
+        batch_size = max(1, min(1024, 4_000_000 // n_cells))
+
+    n_tasks = max(1, -(-n_members // members_per_task))
+    seeds = np.random.SeedSequence(seed).spawn(n_tasks)
+    sizes = [min(members_per_task, n_members - i * members_per_task) for i in range(n_tasks)]
+    tasks = ((distributions, size, task_seed, grid, thresholds, batch_size)
+             for size, task_seed in zip(sizes, seeds))
+
+    accumulator = EnsembleAccumulator(n_cells, thresholds)
+    if workers == 0:
+        run_bounded(None, _run_members, tasks, accumulator.merge, 1)
+        return EnsembleResult(grid, accumulator)
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Each partial accumulator is grid-sized, so only a few are in flight at once.
+        run_bounded(pool, _run_members, tasks, accumulator.merge, 2 * workers)
+    return EnsembleResult(grid, accumulator)
+
+if __name__ == '__main__':
+    import time
+
+    uncertain = {
+        'yield_kt': ('lognormal', 100.0, 0.3),
+        'wind_speed_kph': ('normal', 24.0, 5.0),
+        'wind_direction': ('vonmises', 90.0, 8.0),
+        'fission_fraction': ('uniform', 0.4, 0.6),
+    }
+    start = time.perf_counter()
+    result = run_ensemble(28.6139, 77.2090, 10_000, uncertain, extent_miles=30.0, seed=1)
+    print(f"{result.n_members} members in {time.perf_counter() - start:.1f} s on a {result.grid.shape} grid")
+    for level in DEFAULT_DOSE_LEVELS:
+        area = np.count_nonzero(result.exceedance_map(level).values >= 0.5) * result.grid.cell_miles**2
+        print(f"  P(>= {level} rad/hr) >= 50%: {area:.1f} sq mi")
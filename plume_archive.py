@@ -0,0 +1,273 @@
+# plume_archive.py
+
+import json
+import os
+
+import numpy as np
+
+# --- Compact Result Type ---
+
+CENTERLINE_DTYPE = np.dtype([('distance_miles', '<f4'), ('dose_rate', '<f4')])
+POINT_DTYPE = np.dtype([('x', '<f4'), ('y', '<f4')])
+
+class PlumeResult:
+    """
+    An array-backed plume result.
+
+    The centerline is one structured array, and all contour vertices of a result share a
+    single structured `points` array; contour i is points[offsets[i]:offsets[i + 1]] at
+    dose rate levels[i]. Values are stored as float32, which is finer than any map can
+    show and a fraction of the size of lists of Python tuples. `contours` and
+    `centerline_data` give the same shapes calculate_full_plume returns.
+    """
+
+    def __init__(self, angle, centerline, levels, offsets, points, inputs=None):
+        self.angle = float(angle)
+        self.centerline = centerline
+        self.levels = levels
+        self.offsets = offsets
+        self.points = points
+        # Physics inputs (yield_kt, wind_speed_kph, fission_fraction), if known.
+        self.inputs = inputs or {}
+        self._contours = None
+
+    @classmethod
+    def from_plume(cls, plume, **inputs):
+        """Packs a calculate_full_plume result; `inputs` are stored alongside it."""
+        centerline = np.array([tuple(row) for row in plume['centerline_data']], dtype=CENTERLINE_DTYPE)
+        keys = sorted(plume['contours'], key=lambda k: float(k.split('_')[0]), reverse=True)
+        arrays = [np.asarray(plume['contours'][k], dtype=np.float32).reshape(-1, 2) for k in keys]
+        levels = np.array([float(k.split('_')[0]) for k in keys], dtype=np.float32)
+        offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(a) for a in arrays])
+        points = np.concatenate(arrays) if arrays else np.zeros((0, 2), dtype=np.float32)
+        return cls(plume['angle'], centerline, levels, offsets,
+                   np.ascontiguousarray(points).view(POINT_DTYPE).ravel(), inputs)
+
+    def contour(self, level):
+        """The (n, 2) float32 polygon for a dose rate level, as a view into `points`."""
+        i = np.flatnonzero(self.levels == np.float32(level))
+        if len(i) == 0:
+            raise KeyError(level)
+        start, end = self.offsets[i[0]], self.offsets[i[0] + 1]
+        return self.points[start:end].view(np.float32).reshape(-1, 2)
+
+    @property
+    def contours(self):
+        # Built once, so drawing code that caches by array identity keeps its buffers.
+        if self._contours is None:
+            self._contours = {f'{level:g}_rad_hr': self.contour(level) for level in self.levels}
+        return self._contours
+
+    @property
+    def centerline_data(self):
+        return list(zip(self.centerline['distance_miles'].tolist(), self.centerline['dose_rate'].tolist()))
+
+    def to_dict(self):
+        """The result in calculate_full_plume's format, e.g. for PlumeDrawingWidget."""
+        return {'angle': self.angle, 'contours': self.contours, 'centerline_data': self.centerline_data}
+
+    @property
+    def nbytes(self):
+        return self.centerline.nbytes + self.levels.nbytes + self.offsets.nbytes + self.points.nbytes
+
+    def __eq__(self, other):
+        if not isinstance(other, PlumeResult):
+            return NotImplemented
+        return (self.angle == other.angle
+                and np.array_equal(self.levels, other.levels)
+                and np.array_equal(self.offsets, other.offsets)
+                and np.array_equal(self.points, other.points)
+                and np.array_equal(self.centerline, other.centerline))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"PlumeResult(angle={self.angle}, {len(self.levels)} contours, {self.nbytes} bytes)"
+
+# --- Scenario Archive ---
+# An archive is a directory of raw little-endian record files plus a small manifest
+# holding their record counts. Every file is memory-mapped on open, so loading costs
+# nothing up front and a scenario is read from disk only when it is accessed.
+
+ARCHIVE_VERSION = 1
+MAX_ID_BYTES = 64
+
+INDEX_DTYPE = np.dtype([
+    ('id', f'S{MAX_ID_BYTES}'),
+    ('angle', '<f4'),
+    ('yield_kt', '<f4'),
+    ('wind_speed_kph', '<f4'),
+    ('fission_fraction', '<f4'),
+    ('centerline_start', '<i8'),
+    ('centerline_count', '<i8'),
+    ('contour_start', '<i8'),
+    ('contour_count', '<i8'),
+])
+CONTOUR_DTYPE = np.dtype([('level', '<f4'), ('point_start', '<i8'), ('point_count', '<i8')])
+
+# Record file name and dtype of every table in an archive.
+ARCHIVE_TABLES = {
+    'index': INDEX_DTYPE,
+    'contours': CONTOUR_DTYPE,
+    'centerline': CENTERLINE_DTYPE,
+    'points': POINT_DTYPE,
+}
+INPUT_FIELDS = ('yield_kt', 'wind_speed_kph', 'fission_fraction')
+
+def _encode_id(scenario_id):
+    encoded = str(scenario_id).encode('utf-8')
+    if len(encoded) > MAX_ID_BYTES:
+        raise ValueError(f"Scenario ID longer than {MAX_ID_BYTES} bytes: {scenario_id!r}")
+    return encoded
+
+def _read_manifest(path):
+    with open(os.path.join(path, 'manifest.json')) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != ARCHIVE_VERSION:
+        raise ValueError(f"Unsupported plume archive version: {manifest.get('version')}")
+    return manifest
+
+class PlumeArchiveWriter:
+    """
+    Appends scenarios to an archive directory (created if needed).
+
+    Records are streamed to disk as they are added; the manifest, which makes them
+    visible to readers, is written atomically by close(). Records past the manifest's
+    counts (from a writer that never closed) are discarded when appending.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        try:
+            counts = _read_manifest(path)['counts']
+        except FileNotFoundError:
+            counts = {name: 0 for name in ARCHIVE_TABLES}
+        self.counts = dict(counts)
+        self._ids = set(PlumeArchive(path).index['id'].tolist()) if self.counts['index'] else set()
+        self._files = {}
+        for name, dtype in ARCHIVE_TABLES.items():
+            f = open(os.path.join(path, f'{name}.bin'), 'ab')
+            f.truncate(self.counts[name] * dtype.itemsize)
+            self._files[name] = f
+
+    def add(self, scenario_id, result):
+        """Stores a PlumeResult (or a calculate_full_plume dict) under scenario_id."""
+        encoded = _encode_id(scenario_id)
+        if encoded in self._ids:
+            raise ValueError(f"Duplicate scenario ID: {scenario_id!r}")
+        if not isinstance(result, PlumeResult):
+            result = PlumeResult.from_plume(result)
+
+        contours = np.zeros(len(result.levels), dtype=CONTOUR_DTYPE)
+        contours['level'] = result.levels
+        contours['point_start'] = self.counts['points'] + result.offsets[:-1]
+        contours['point_count'] = np.diff(result.offsets)
+
+        record = np.zeros(1, dtype=INDEX_DTYPE)
+        record['id'] = encoded
+        record['angle'] = result.angle
+        for field in INPUT_FIELDS:
+            record[field] = result.inputs.get(field, np.nan)
+        record['centerline_start'] = self.counts['centerline']
+        record['centerline_count'] = len(result.centerline)
+        record['contour_start'] = self.counts['contours']
+        record['contour_count'] = len(contours)
+
+        for name, table in (('index', record), ('contours', contours),
+                            ('centerline', result.centerline), ('points', result.points)):
+            self._files[name].write(np.ascontiguousarray(table, dtype=ARCHIVE_TABLES[name]).tobytes())
+            self.counts[name] += len(table)
+        self._ids.add(encoded)
+
+    def close(self):
+        if self._files is None:
+            return
+        for f in self._files.values():
+            f.close()
+        self._files = None
+        manifest_path = os.path.join(self.path, 'manifest.json')
+        tmp_path = manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': ARCHIVE_VERSION, 'counts': self.counts}, f)
+        os.replace(tmp_path, manifest_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class PlumeArchive:
+    """
+    Read-only, memory-mapped access to an archive written by PlumeArchiveWriter.
+
+    archive[scenario_id] returns a PlumeResult whose arrays are views into the mapped
+    files; nothing is parsed or copied. IDs are looked up by binary search over a
+    sorted order built on first use.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        counts = _read_manifest(path)['counts']
+        self._tables = {}
+        for name, dtype in ARCHIVE_TABLES.items():
+            if counts[name]:
+                self._tables[name] = np.memmap(os.path.join(path, f'{name}.bin'), dtype=dtype,
+                                               mode='r', shape=(counts[name],))
+            else:
+                # Empty files cannot be mapped.
+                self._tables[name] = np.zeros(0, dtype=dtype)
+        self.index = self._tables['index']
+        # Built together on the first lookup.
+        self._order = None
+        self._sorted_ids = None
+
+    def __len__(self):
+        return len(self.index)
+
+    def ids(self):
+        return [i.decode('utf-8') for i in self.index['id']]
+
+    def _find(self, scenario_id):
+        if self._order is None:
+            self._order = np.argsort(self.index['id'], kind='stable')
+            self._sorted_ids = self.index['id'][self._order]
+        key = np.array(_encode_id(scenario_id), dtype=INDEX_DTYPE['id'])
+        pos = int(np.searchsorted(self._sorted_ids, key))
+        if pos < len(self._sorted_ids) and self._sorted_ids[pos] == key:
+            return int(self._order[pos])
+        return None
+
+    def __contains__(self, scenario_id):
+        return self._find(scenario_id) is not None
+
+    def __getitem__(self, scenario_id):
+        row = self._find(scenario_id)
+        if row is None:
+            raise KeyError(scenario_id)
+        return self.result_at(row)
+
+    def get(self, scenario_id, default=None):
+        row = self._find(scenario_id)
+        return default if row is None else self.result_at(row)
+
+    def result_at(self, row):
+        """The scenario stored at position `row` (in the order it was written)."""
+        record = self.index[row]
+        c0, nc = int(record['contour_start']), int(record['contour_count'])
+        contours = self._tables['contours'][c0:c0 + nc]
+        # Contours of one scenario are stored back to back, so their points are one slice.
+        p0 = int(contours['point_start'][0]) if nc else 0
+        n_points = int(contours['point_count'].sum()) if nc else 0
+        offsets = np.zeros(nc + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(contours['point_count'])
+        l0, nl = int(record['centerline_start']), int(record['centerline_count'])
+        inputs = {field: float(record[field]) for field in INPUT_FIELDS if not np.isnan(record[field])}
+        return PlumeResult(record['angle'], self._tables['centerline'][l0:l0 + nl], np.array(contours['level']),
+                           offsets, self._tables['points'][p0:p0 + n_points], inputs)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.index['id'][row].decode('utf-8'), self.result_at(row)
@@ -0,0 +1,171 @@
+# plume_cache.py
+
+import inspect
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+import numpy as np
+
+from plume_model import calculate_full_plume, calculate_plume
+
+# Quantization step for each numeric input. Inputs are rounded to a multiple of their step
+# before both the cache lookup and the calculation, so "nearly the same" requests share an entry.
+DEFAULT_PRECISION = {
+    'yield_kt': 0.1,
+    'wind_speed_kph': 0.1,
+    'wind_direction': 0.1,  # Numeric angles only; compass strings are matched case-insensitively.
+    'fission_fraction': 0.001,
+    'tolerance': 1e-4,
+}
+
+# Version of the persisted cache format and of the results in it. Bump it whenever the
+# physics or the result layout changes, so stale files are discarded instead of loaded.
+CACHE_VERSION = 1
+
+def _freeze(value):
+    """Recursively converts a result into a read-only structure that is safe to share."""
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+        return value
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+def _thaw(value):
+    """Converts a frozen result back into plain picklable containers."""
+    if isinstance(value, MappingProxyType):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return tuple(_thaw(v) for v in value)
+    return value
+
+class PlumeCache:
+    """
+    A bounded LRU cache in front of the plume calculations.
+
+    Keys are the function name plus its inputs quantized to `precision`. Cached results
+    are frozen (read-only arrays, mapping proxies, tuples) so the UI can hold on to them
+    without risking corruption of the shared entry. If `persist_path` is given the cache
+    is loaded from it on creation and written back by save().
+    """
+
+    def __init__(self, maxsize=256, precision=None, persist_path=None):
+        self.maxsize = maxsize
+        self.precision = dict(DEFAULT_PRECISION, **(precision or {}))
+        self.persist_path = persist_path
+        self._entries = OrderedDict()
+        self._signatures = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if persist_path and os.path.exists(persist_path):
+            self.load()
+
+    def _quantize_arguments(self, func, args, kwargs):
+        signature = self._signatures.get(func)
+        if signature is None:
+            signature = self._signatures[func] = inspect.signature(func)
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        for name, value in bound.arguments.items():
+            step = self.precision.get(name)
+            if step and isinstance(value, (int, float)):
+                # Round to the step, then to 12 decimal places so the key is stable.
+                bound.arguments[name] = round(round(value / step) * step, 12)
+            elif name == 'wind_direction' and isinstance(value, str):
+                bound.arguments[name] = value.upper()
+        return bound
+
+    def get_or_compute(self, func, *args, **kwargs):
+        """Returns the cached result of func(*args, **kwargs), computing it on a miss."""
+        bound = self._quantize_arguments(func, args, kwargs)
+        key = (func.__name__, tuple(bound.arguments.items()))
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Compute outside the lock so a slow scenario does not block cache hits.
+        result = _freeze(func(*bound.args, **bound.kwargs))
+
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def stats(self):
+        """Returns the hit/miss/eviction counters and current size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def save(self, path=None):
+        """Writes the cache to disk atomically so an interrupted write never corrupts it."""
+        path = path or self.persist_path
+        if not path:
+            return
+        with self._lock:
+            entries = [(key, _thaw(value)) for key, value in self._entries.items()]
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'version': CACHE_VERSION, 'entries': entries}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def load(self, path=None):
+        """
+        Loads entries saved by save(). A file from another CACHE_VERSION, or one that cannot
+        be read for any reason, is deleted and the cache is left empty.
+        """
+        path = path or self.persist_path
+        try:
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+            version = data.get('version') if isinstance(data, dict) else None
+            if version != CACHE_VERSION:
+                raise ValueError(f"version {version!r}, expected {CACHE_VERSION}")
+            entries = [(key, _freeze(value)) for key, value in data['entries'][-self.maxsize:]]
+        except Exception as e:
+            print(f"Discarding plume cache {path}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            for key, value in entries:
+                self._entries[key] = value
+
+# Shared cache used by the app.
+default_cache = PlumeCache()
+
+def cached_calculate_full_plume(yield_kt, wind_speed_kph, wind_direction, fission_fraction=0.5,
+                                sampling='linear', tolerance=0.01, cache=None):
+    """Memoized calculate_full_plume; returns a frozen result."""
+    return (default_cache if cache is None else cache).get_or_compute(
+        calculate_full_plume, yield_kt, wind_speed_kph, wind_direction, fission_fraction, sampling, tolerance
+    )
+
+def cached_calculate_plume(yield_kt, wind_speed_kph, wind_direction, cache=None):
+    """Memoized calculate_plume; returns a frozen result."""
+    return (default_cache if cache is None else cache).get_or_compute(calculate_plume, yield_kt, wind_speed_kph, wind_direction)
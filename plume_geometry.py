@@ -0,0 +1,297 @@
+# plume_geometry.py
+
+import weakref
+
+import numpy as np
+
+# Triangulated buffers keyed by id() of the contour array they were built from.
+# Entries are dropped automatically when that array is garbage collected.
+_buffer_cache = {}
+
+def _is_mirrored_plume(points):
+    """
+    True for the shape _generate_contours produces: ground zero, an upper edge with
+    non-decreasing x and y >= 0, an optional tip on the x-axis, and the upper edge
+    mirrored back across the x-axis.
+    """
+    ring = points[1:]
+    if len(ring) < 2 or not np.allclose(ring[::-1] * (1, -1), ring):
+        return False
+    upper = ring[:(len(ring) + 1) // 2]
+    return bool(np.all(np.diff(upper[:, 0]) >= 0) and np.all(upper[:, 1] >= 0))
+
+def _strip_indices(n_points):
+    """
+    Triangulates a mirrored plume polygon of n_points vertices. The area between each
+    pair of neighbouring upper-edge vertices and their mirror images is a trapezoid with
+    vertical sides, which is always convex and is split into two triangles.
+    """
+    n_ring = n_points - 1
+    n_edge = n_ring // 2
+    upper = np.arange(1, n_edge + 1)
+    lower = n_points - upper  # Mirror image of each upper vertex.
+    triangles = [np.array([[0, upper[0], lower[0]]])]
+    if n_edge > 1:
+        u0, u1, l0, l1 = upper[:-1], upper[1:], lower[:-1], lower[1:]
+        triangles.append(np.column_stack((u0, u1, l1)))
+        triangles.append(np.column_stack((u0, l1, l0)))
+    if n_ring % 2:
+        # Interpolated tip on the centerline between the last upper and lower vertices.
+        tip = n_edge + 1
+        triangles.append(np.array([[upper[-1], tip, lower[-1]]]))
+    return np.concatenate(triangles).ravel()
+
+def _ear_clip_indices(points):
+    """
+    Ear-clipping triangulation for any simple polygon (convex or not).
+
+    Corners are tested for all remaining vertices at once, and every other ear is
+    clipped in the same round: ears that are not neighbours cannot affect each other,
+    so smooth contours need only a few dozen rounds instead of one pass per vertex.
+    """
+    n = len(points)
+    x, y = points[:, 0], points[:, 1]
+    # Work in counter-clockwise order so a convex corner has a positive cross product.
+    signed_area = 0.5 * np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y)
+    remaining = np.arange(n) if signed_area > 0 else np.arange(n - 1, -1, -1)
+
+    def cross(o, a, b):
+        return (a[..., 0] - o[..., 0]) * (b[..., 1] - o[..., 1]) - (a[..., 1] - o[..., 1]) * (b[..., 0] - o[..., 0])
+
+    triangles = []
+    parity = 0
+    while len(remaining) > 3:
+        m = len(remaining)
+        prev, nxt = np.roll(remaining, 1), np.roll(remaining, -1)
+        a, b, c = points[prev], points[remaining], points[nxt]
+        turn = cross(a, b, c)
+        ears = turn > 0
+
+        # An ear must not contain another vertex; only reflex (or flat) ones can be inside.
+        reflex = remaining[turn <= 0]
+        candidates = np.flatnonzero(ears)
+        if len(reflex) and len(candidates):
+            others = points[reflex][None, :, :]
+            ca, cb, cc = a[candidates, None, :], b[candidates, None, :], c[candidates, None, :]
+            inside = (cross(ca, cb, others) >= 0) & (cross(cb, cc, others) >= 0) & (cross(cc, ca, others) >= 0)
+            inside &= (reflex != prev[candidates, None]) & (reflex != nxt[candidates, None])
+            ears[candidates[inside.any(axis=1)]] = False
+
+        clip = ears & (np.arange(m) % 2 == parity)
+        if m % 2:
+            clip[-1] &= not clip[0]  # The first and last vertices are neighbours.
+        parity ^= 1
+        if not clip.any():
+            if ears.any():
+                clip[np.argmax(ears)] = True
+            elif np.any(turn == 0) and np.count_nonzero(turn) >= 3:
+                remaining = remaining[turn != 0]  # Drop flat corners; they enclose no area.
+                continue
+            else:
+                break  # Not a simple polygon.
+        triangles.append(np.column_stack((prev[clip], remaining[clip], nxt[clip])))
+        remaining = remaining[~clip]
+    if len(remaining) == 3:
+        triangles.append(remaining[None, :])
+    if not triangles:
+        return np.zeros(0, dtype=np.intp)
+    return np.concatenate(triangles).ravel().astype(np.intp)
+
+def triangulate_polygon(points):
+    """
+    Triangulates a polygon for Mesh rendering.
+
+    Plume contours take a vectorized strip path; any other shape falls back to ear
+    clipping, which (unlike a fan from vertex 0) is correct for non-convex polygons.
+    Returns (vertices, indices) as NumPy arrays: vertices is (n, 4) float32 rows of
+    [x, y, u, v] with zero texture coordinates, indices is a flat array of triangles.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if len(points) < 3:
+        return np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.intp)
+
+    vertices = np.zeros((len(points), 4), dtype=np.float32)
+    vertices[:, :2] = points
+    if _is_mirrored_plume(points):
+        indices = _strip_indices(len(points))
+    else:
+        indices = _ear_clip_indices(points)
+    return vertices, indices
+
+def contour_buffers(points):
+    """
+    Returns (vertices, indices, outline) lists ready for Kivy's Mesh and Line, in the
+    contour's own units (miles). Results for a NumPy contour are cached for as long as
+    the array is alive, so redrawing a result never triangulates it again.
+    """
+    key = id(points) if isinstance(points, np.ndarray) else None
+    cached = _buffer_cache.get(key)
+    if cached is not None:
+        return cached
+
+    vertices, indices = triangulate_polygon(points)
+    buffers = (
+        vertices.ravel().tolist(),
+        indices.tolist(),
+        vertices[:, :2].ravel().tolist(),
+    )
+    if key is not None:
+        _buffer_cache[key] = buffers
+        weakref.finalize(points, _buffer_cache.pop, key, None)
+    return buffers
+
+# --- Level of Detail ---
+
+# Simplification tolerances (miles) precomputed for every result, finest first.
+LOD_TOLERANCES = (0.0, 0.005, 0.02, 0.1, 0.5)
+
+def simplify_polyline(points, tolerance):
+    """
+    Douglas-Peucker simplification of an open polyline. The first and last vertices are
+    always kept and no dropped vertex lies further than `tolerance` from the result.
+    Distances for each segment are computed for all of its vertices at once.
+    """
+    points = np.asarray(points, dtype=float)
+    n = len(points)
+    if tolerance <= 0 or n < 3:
+        return points
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = points[start], points[end]
+        inner = points[start + 1:end]
+        ab = b - a
+        length = np.hypot(*ab)
+        if length == 0:
+            distances = np.hypot(*(inner - a).T)
+        else:
+            distances = np.abs(ab[0] * (inner[:, 1] - a[1]) - ab[1] * (inner[:, 0] - a[0])) / length
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return points[keep]
+
+def simplify_contour(points, tolerance):
+    """
+    Simplifies a contour polygon to within `tolerance` (same units as the points).
+
+    For plume contours only the upper half (ground zero to tip) is simplified and the
+    result is mirrored, which keeps the polygon symmetric, x-monotone and therefore
+    free of self-intersections. Other polygons are simplified as two open chains
+    split at the vertex furthest from the first one.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if tolerance <= 0 or len(points) < 4:
+        return np.ascontiguousarray(points)
+
+    if _is_mirrored_plume(points):
+        n_ring = len(points) - 1
+        half = points[:1 + (n_ring + 1) // 2]  # Ground zero, upper edge and the tip if present.
+        upper = simplify_polyline(half, tolerance)
+        if len(upper) < 3:
+            # Never collapse a contour to a line: keep its widest point.
+            widest = int(np.argmax(half[:, 1]))
+            upper = half[sorted({0, widest, len(half) - 1})]
+        if n_ring % 2:
+            # The last kept vertex is the tip on the centerline; it is not duplicated.
+            mirrored = upper[-2:0:-1] * (1, -1)
+        else:
+            mirrored = upper[:0:-1] * (1, -1)
+        return np.ascontiguousarray(np.concatenate((upper, mirrored)))
+
+    far = int(np.argmax(np.hypot(*(points - points[0]).T)))
+    first = simplify_polyline(points[:far + 1], tolerance)
+    second = simplify_polyline(np.concatenate((points[far:], points[:1])), tolerance)
+    return np.ascontiguousarray(np.concatenate((first, second[1:-1])))
+
+def simplify_contours(contours, tolerance):
+    """
+    Simplifies every polygon of a contours dictionary (e.g. before exporting). Entries
+    may be one polygon or, for multi-burst fields, a list of polygons.
+    """
+    return {
+        key: [simplify_contour(p, tolerance) for p in points] if isinstance(points, list)
+        else simplify_contour(points, tolerance)
+        for key, points in contours.items()
+    }
+
+class ContourLOD:
+    """
+    Precomputed level-of-detail tiers for one set of contours.
+
+    Each tier is simplified once up front; for_scale() picks the coarsest tier whose
+    error stays below `pixel_tolerance` screen pixels at the current map scale. Tier
+    arrays are reused between calls, so their triangulation stays cached too.
+    """
+
+    def __init__(self, contours, tolerances=LOD_TOLERANCES):
+        self.tolerances = tuple(sorted(tolerances))
+        self.tiers = [contours if tol == 0 else simplify_contours(contours, tol) for tol in self.tolerances]
+
+    def build_buffers(self):
+        """
+        Triangulates every polygon of every tier now (see contour_buffers), so a worker
+        thread can prepare a result and drawing it later only creates the instructions.
+        Returns self.
+        """
+        for contours in self.tiers:
+            for polygons in contours.values():
+                for points in polygons if isinstance(polygons, list) else [polygons]:
+                    if len(points) >= 3:
+                        contour_buffers(points)
+        return self
+
+    def tier_for_scale(self, pixels_per_mile, pixel_tolerance=0.5):
+        allowed = pixel_tolerance / max(pixels_per_mile, 1e-12)
+        tier = 0
+        for i, tol in enumerate(self.tolerances):
+            if tol <= allowed:
+                tier = i
+        return tier
+
+    def for_scale(self, pixels_per_mile, pixel_tolerance=0.5):
+        return self.tiers[self.tier_for_scale(pixels_per_mile, pixel_tolerance)]
+
+# --- Downwind Slabs ---
+
+def plume_slabs(points, edges):
+    """
+    Cuts a mirrored plume contour into slabs between the downwind distances `edges`.
+
+    Returns a list of (slab_index, vertices, indices) for every slab the contour reaches,
+    with buffers in the same layout as triangulate_polygon. The upper edge is resampled
+    at the slab boundaries, so neighbouring slabs meet without gaps or overlaps.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if not _is_mirrored_plume(points):
+        raise ValueError("plume_slabs needs a single-burst plume contour")
+    n_ring = len(points) - 1
+    upper = points[:1 + (n_ring + 1) // 2]
+    tip = upper[-1, 0]
+
+    slabs = []
+    for i, (start, end) in enumerate(zip(edges[:-1], edges[1:])):
+        if start >= tip:
+            break
+        end = min(end, tip)
+        inside = upper[:, 0][(upper[:, 0] > start) & (upper[:, 0] < end)]
+        xs = np.concatenate(([start], inside, [end]))
+        ys = np.interp(xs, upper[:, 0], upper[:, 1])
+        n = len(xs)
+        vertices = np.zeros((2 * n, 4), dtype=np.float32)
+        vertices[:n, 0] = vertices[n:, 0] = xs
+        vertices[:n, 1] = ys
+        vertices[n:, 1] = -ys
+        # Each step along the slab is a trapezoid between the edge and its mirror image.
+        u0, u1 = np.arange(n - 1), np.arange(1, n)
+        l0, l1 = u0 + n, u1 + n
+        indices = np.concatenate((np.column_stack((u0, u1, l1)), np.column_stack((u0, l1, l0)))).ravel()
+        slabs.append((i, vertices, indices))
+    return slabs
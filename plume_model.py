@@ -2,25 +2,40 @@
 
 import numpy as np
 
+from instrumentation import span
+
 # A dictionary to map wind direction strings to rotation angles in degrees.
 DIRECTION_MAP = {
     'N': 0, 'NE': 45, 'E': 90, 'SE': 135,
     'S': 180, 'SW': 225, 'W': 270, 'NW': 315
 }
 
-def _calculate_centerline_dose(yield_kt, wind_speed_mph, fission_fraction=0.5):
+# Default downwind sample points: 300 points from 0.1 miles to 300 miles.
+# Built once at import time so repeated calls do not rebuild the grid.
+DEFAULT_DISTANCES_MILES = np.linspace(0.1, 300, num=300)
+
+# The WSEG-10 model requires units of miles per hour.
+MPH_PER_KPH = 0.621371
+
+# Dose-rate levels (rad/hr) drawn as contours, from highest to lowest.
+DEFAULT_DOSE_LEVELS = (1000, 300, 100, 30, 10)
+
+# Crosswind constant of the Gaussian plume profile exp(-k * (y / x)^2), an empirical
+# constant for atmospheric stability.
+CROSSWIND_K = 2.77
+
+def _wseg10_dose_rates(yield_kt, wind_speed_mph, fission_fraction, distances_miles):
     """
-    Calculates the H+1 dose rate (rad/hr) along the downwind centerline using the WSEG-10 model.
-    This is the core physics engine based on Glasstone & Dolan's "The Effects of Nuclear Weapons".
+    Evaluates the WSEG-10 H+1 centerline dose rate (rad/hr).
+    All arguments are NumPy-broadcastable, so a single call can cover one scenario
+    or a whole (n_scenarios x n_distances) ensemble.
     """
     # --- Constants and Unit Conversions ---
     R1 = 2900  # Unit-time reference dose rate: (rad/hr)/(kt/mi^2)
-    Y_MT = yield_kt / 1000.0  # The formula requires weapon yield in MEGATONS.
+    Y_MT = np.asarray(yield_kt, dtype=float) / 1000.0  # The formula requires weapon yield in MEGATONS.
+    wind_speed_mph = np.asarray(wind_speed_mph, dtype=float)
+    distances_miles = np.asarray(distances_miles, dtype=float)
 
-    # --- Generate distances to calculate for ---
-    # We create an array of 300 points from 0.1 miles to 300 miles downwind.
-    distances_miles = np.linspace(0.1, 300, num=300)
-    
     # --- W(d) Calculation: Total Activity Deposited per Unit Area ---
     # This is the main empirical formula from the WSEG-10 report.
     numerator = 6.3 * (Y_MT**0.18) * np.exp(-0.61 * ((wind_speed_mph / 15.0)**-0.4) * (distances_miles**0.75))
@@ -29,7 +44,101 @@ def _calculate_centerline_dose(yield_kt, wind_speed_mph, fission_fraction=0.5):
 
     # --- Final Dose Rate Calculation ---
     # The H+1 dose rate is a product of the reference rate, the deposited activity, and the fission fraction.
-    dose_rates_rad_hr = R1 * Wd * fission_fraction
+    return R1 * Wd * fission_fraction
+
+def _crossing_distances(yield_kt, wind_speed_mph, fission_fraction, levels, max_distance=300.0,
+                        num_points=64, iterations=2):
+    """
+    Finds the downwind distance (miles) at which the centerline dose falls to each of `levels`.
+
+    The WSEG-10 centerline decreases monotonically with distance, so one log-spaced
+    evaluation brackets every crossing at once. A few regula falsi steps in log-log space
+    (Illinois variant, all levels together) then tighten each bracket. The far end of the
+    bracket is returned: it is never short of the crossing, so contour tips can always be
+    interpolated, and two steps leave it within about 0.1% of the crossing.
+    """
+    levels = np.atleast_1d(np.asarray(levels, dtype=float))
+    # exp(linspace) rather than geomspace, which is several times slower at this size.
+    log_distances = np.linspace(np.log(DEFAULT_DISTANCES_MILES[0]), np.log(max_distance), num_points)
+    distances = np.exp(log_distances)
+    log_doses = np.log(_wseg10_dose_rates(yield_kt, wind_speed_mph, fission_fraction, distances))
+    log_levels = np.log(levels)
+    below = log_doses[None, :] < log_levels[:, None]
+    i = np.clip(np.argmax(below, axis=1), 1, num_points - 1)
+
+    # Bracket [a, b] in log distance with f = log(dose / level): f(a) >= 0 > f(b).
+    a, b = log_distances[i - 1], log_distances[i]
+    fa, fb = log_doses[i - 1] - log_levels, log_doses[i] - log_levels
+    for _ in range(iterations):
+        c = b - fb * (b - a) / (fb - fa)
+        fc = np.log(_wseg10_dose_rates(yield_kt, wind_speed_mph, fission_fraction, np.exp(c))) - log_levels
+        above = fc >= 0
+        # The endpoint that is kept has its value halved, so neither side stalls.
+        a, fa, b, fb = (np.where(above, c, a), np.where(above, fc, fa * 0.5),
+                        np.where(above, b, c), np.where(above, fb * 0.5, fc))
+
+    crossings = np.exp(b)
+    crossings = np.where(below[:, 0], distances[0], crossings)
+    return np.where(below.any(axis=1), crossings, max_distance)
+
+def _cutoff_distance(yield_kt, wind_speed_mph, fission_fraction, min_dose, max_distance=300.0):
+    """The downwind distance (miles) at which the centerline dose falls to min_dose."""
+    return float(_crossing_distances(yield_kt, wind_speed_mph, fission_fraction, min_dose, max_distance)[0])
+
+def _adaptive_distances(yield_kt, wind_speed_mph, fission_fraction, target_doses, tolerance):
+    """
+    Builds a distance grid on which the straight polygon edges between samples track the
+    true contour widths to within about `tolerance` (a fraction of each contour's
+    maximum width), in a single model evaluation.
+
+    A contour's width grows like sqrt(tip - d) near its tip, so the last stretch before
+    each level's tip gets points clustered quadratically towards it, where that curve is
+    straight in the grid parameter; a log-spaced base grid covers the rest. Every contour
+    uses every sample short of its tip, so the clusters are kept short. Edge errors shrink
+    with the square of the spacing, so point counts grow as 1/sqrt(tolerance).
+    """
+    # Widths near a tip go as the square root of its error, so tight tolerances need a few
+    # more root-finding steps.
+    tips = _crossing_distances(yield_kt, wind_speed_mph, fission_fraction, target_doses,
+                               iterations=2 if tolerance >= 0.005 else 4)
+    start = DEFAULT_DISTANCES_MILES[0]
+    n_base = int(np.clip(np.ceil(3.0 / np.sqrt(tolerance)), 4, 256))
+    n_tip = int(np.clip(np.ceil(2.0 / np.sqrt(tolerance)), 4, 256))
+
+    u = np.linspace(0.0, 1.0, n_tip)[1:]
+    cluster_start = np.maximum(0.8 * tips, start)
+    clustered = cluster_start[:, None] + (tips - cluster_start)[:, None] * (1.0 - (1.0 - u[None, :]) ** 2)
+    base = np.exp(np.linspace(np.log(start), np.log(tips.max()), n_base))
+    distances = np.sort(np.concatenate((base, clustered.ravel())))
+    return distances, _wseg10_dose_rates(yield_kt, wind_speed_mph, fission_fraction, distances)
+
+def _calculate_centerline_dose(yield_kt, wind_speed_mph, fission_fraction=0.5, sampling='linear',
+                               tolerance=0.01, target_doses=DEFAULT_DOSE_LEVELS, num_points=300):
+    """
+    Calculates the H+1 dose rate (rad/hr) along the downwind centerline using the WSEG-10 model.
+    This is the core physics engine based on Glasstone & Dolan's "The Effects of Nuclear Weapons".
+
+    Sampling modes:
+        'linear'   - the original 300 evenly spaced points from 0.1 to 300 miles.
+        'log'      - num_points log-spaced points, ending where the dose drops below
+                     the lowest of target_doses.
+        'adaptive' - a grid clustered towards the tip of each of target_doses, sized so
+                     the contours are reproduced to within about `tolerance`; looser
+                     tolerances cost fewer points.
+    """
+    if sampling == 'linear':
+        distances_miles = DEFAULT_DISTANCES_MILES
+        dose_rates_rad_hr = _wseg10_dose_rates(yield_kt, wind_speed_mph, fission_fraction, distances_miles)
+    elif sampling == 'log':
+        end_distance = _cutoff_distance(yield_kt, wind_speed_mph, fission_fraction, min(target_doses))
+        distances_miles = np.geomspace(DEFAULT_DISTANCES_MILES[0], end_distance, num=num_points)
+        dose_rates_rad_hr = _wseg10_dose_rates(yield_kt, wind_speed_mph, fission_fraction, distances_miles)
+    elif sampling == 'adaptive':
+        distances_miles, dose_rates_rad_hr = _adaptive_distances(
+            yield_kt, wind_speed_mph, fission_fraction, target_doses, tolerance
+        )
+    else:
+        raise ValueError(f"Unknown sampling mode: {sampling!r}")
 
     # --- Format the Output ---
     # Return a clean list of (distance, dose_rate) tuples, filtering out negligible values.
@@ -37,61 +146,121 @@ def _calculate_centerline_dose(yield_kt, wind_speed_mph, fission_fraction=0.5):
     
     return centerline_data
 
-def _generate_contours(centerline_data, target_doses=[1000, 300, 100, 30, 10]):
+def _generate_contours(centerline_data, target_doses=DEFAULT_DOSE_LEVELS):
     """
     Takes centerline data and generates contour polygons for specific dose rates.
     It uses a Gaussian crosswind distribution model to determine the plume's width.
+
+    All dose levels are evaluated together as a (n_levels x n_points) array. The plume
+    tip of each level is interpolated (log-linearly in dose) between the last sample
+    above the level and the first sample below it, so every polygon closes exactly on
+    the centerline instead of snapping to the nearest sample.
+
+    Returns a dictionary of C-contiguous float arrays of shape (n_vertices, 2).
     """
     contours = {}
-    k = 2.77  # An empirical constant for atmospheric stability.
 
-    for dose_level in target_doses:
-        # Find all points on the centerline where the dose is higher than our target level.
-        relevant_points = [(d, r) for d, r in centerline_data if r >= dose_level]
+    centerline = np.asarray(centerline_data, dtype=float).reshape(-1, 2)
+    if len(centerline) == 0:
+        return contours
+    distances, doses = centerline[:, 0], centerline[:, 1]
+    levels = np.asarray(target_doses, dtype=float)
 
+    # --- Crosswind Widths for Every Level at Once ---
+    # The crosswind distance 'y' where the Gaussian profile falls to the target level:
+    # y = d * sqrt(-(1/k) * ln(level / centerline_dose)), defined where the centerline is above the level.
+    ratio = levels[:, None] / doses[None, :]
+    inside = ratio <= 1.0
+    widths = distances[None, :] * np.sqrt(-np.log(np.where(inside, ratio, 1.0)) / CROSSWIND_K)
+
+    # --- Interpolated Plume Tips ---
+    # Index of the last sample at or above each level, and whether a sample below it follows.
+    n_points = len(distances)
+    reaches = inside.any(axis=1)
+    last = n_points - 1 - np.argmax(inside[:, ::-1], axis=1)
+    has_tip = reaches & (last < n_points - 1)
+    nxt = np.minimum(last + 1, n_points - 1)
+    log_doses = np.log(doses)
+    log_step = log_doses[nxt] - log_doses[last]
+    frac = np.divide(np.log(levels) - log_doses[last], log_step, out=np.zeros_like(levels),
+                     where=has_tip & (log_step != 0))
+    tip_distances = distances[last] + frac * (distances[nxt] - distances[last])
+
+    for i, dose_level in enumerate(target_doses):
         # If no part of the plume reaches this dose level, skip it.
-        if not relevant_points:
+        if not reaches[i]:
             continue
 
-        upper_edge = []
-        for distance, centerline_dose in relevant_points:
-            # This is the formula to calculate the crosswind distance 'y' for the target dose level.
-            ratio = dose_level / centerline_dose
-            log_ratio = np.log(ratio)
-            crosswind_distance = distance * np.sqrt(-(1 / k) * log_ratio)
-            
-            # Add the calculated point (x=distance, y=crosswind_distance) for the upper edge of the plume.
-            upper_edge.append((distance, crosswind_distance))
-
-        # The lower edge is a mirror image of the upper edge across the x-axis.
-        lower_edge = [(d, -y) for d, y in reversed(upper_edge)]
-
-        # Combine the upper and lower edges with the ground zero point (0,0) to form a closed polygon.
-        polygon_points = [(0, 0)] + upper_edge + lower_edge
-        contours[f'{dose_level}_rad_hr'] = polygon_points
+        mask = inside[i]
+        n_edge = int(np.count_nonzero(mask))
+        n_tip = 1 if has_tip[i] else 0
+
+        # Ground zero (0,0), the upper edge, the interpolated tip on the centerline,
+        # then the lower edge as a mirror image of the upper edge across the x-axis.
+        polygon = np.zeros((1 + 2 * n_edge + n_tip, 2))
+        upper = polygon[1:1 + n_edge]
+        upper[:, 0] = distances[mask]
+        upper[:, 1] = widths[i, mask]
+        if n_tip:
+            polygon[1 + n_edge, 0] = tip_distances[i]
+        lower = polygon[1 + n_edge + n_tip:]
+        lower[:, 0] = upper[::-1, 0]
+        lower[:, 1] = -upper[::-1, 1]
+
+        contours[f'{dose_level}_rad_hr'] = polygon
     
     return contours
 
-def calculate_full_plume(yield_kt, wind_speed_kph, wind_direction, fission_fraction=0.5):
+def _direction_angle(wind_direction):
+    """Converts a compass string from DIRECTION_MAP or a numeric angle in degrees to degrees in [0, 360)."""
+    if isinstance(wind_direction, str):
+        return DIRECTION_MAP.get(wind_direction.upper(), 0)
+    return float(wind_direction) % 360.0
+
+def _dose_field(downwind_miles, crosswind_miles, yield_kt, wind_speed_mph, fission_fraction=0.5):
+    """
+    Evaluates the H+1 dose rate (rad/hr) at arbitrary points in the plume frame.
+
+    This is the same model the contours are drawn from: the WSEG-10 centerline dose
+    multiplied by the Gaussian crosswind profile exp(-k * (y / x)^2). Points upwind of
+    ground zero receive no fallout. All arguments broadcast, so whole grids or point
+    clouds are evaluated in one call.
+    """
+    x = np.asarray(downwind_miles, dtype=float)
+    y = np.asarray(crosswind_miles, dtype=float)
+
+    # Inside the first sample distance the centerline is held at its 0.1 mile value.
+    x_centerline = np.maximum(x, DEFAULT_DISTANCES_MILES[0])
+    centerline = _wseg10_dose_rates(yield_kt, wind_speed_mph, fission_fraction, x_centerline)
+
+    downwind = x > 0
+    spread = np.divide(y, x, out=np.zeros(np.broadcast(x, y).shape), where=downwind)
+    return np.where(downwind, centerline * np.exp(-CROSSWIND_K * spread**2), 0.0)
+
+def calculate_full_plume(yield_kt, wind_speed_kph, wind_direction, fission_fraction=0.5,
+                         sampling='linear', tolerance=0.01):
     """
     This is the main public function that your Kivy app will call.
     It orchestrates the entire calculation process.
+    `sampling` and `tolerance` select the centerline sampling mode (see _calculate_centerline_dose).
     """
     # --- Step 1: Unit Conversions ---
     # The WSEG-10 model requires units of miles per hour.
-    wind_speed_mph = wind_speed_kph * 0.621371
+    wind_speed_mph = wind_speed_kph * MPH_PER_KPH
 
     # --- Step 2: Core Physics Calculation ---
     # Calculate the dose rates along the downwind centerline.
-    centerline_data = _calculate_centerline_dose(yield_kt, wind_speed_mph, fission_fraction)
+    with span('plume.centerline', sampling=sampling):
+        centerline_data = _calculate_centerline_dose(yield_kt, wind_speed_mph, fission_fraction, sampling, tolerance)
     
     # --- Step 3: Contour Generation ---
     # Generate the drawable polygons from the centerline data.
-    contour_polygons = _generate_contours(centerline_data)
+    with span('plume.contours'):
+        contour_polygons = _generate_contours(centerline_data)
 
     # --- Step 4: Final Output ---
     # Package everything into a dictionary that's easy for the UI to use.
-    angle = DIRECTION_MAP.get(wind_direction.upper(), 0)
+    angle = _direction_angle(wind_direction)
     
     output = {
         'angle': angle,
@@ -112,8 +281,8 @@ def calculate_plume(yield_kt, wind_speed_kph, wind_direction):
     # Plume width is a fraction of its length.
     plume_width_km = plume_length_km / 4
 
-    # Convert direction to angle
-    angle = DIRECTION_MAP.get(wind_direction.upper(), 0)
+    # Convert direction to angle (a compass point or degrees)
+    angle = _direction_angle(wind_direction)
     
     return {
         'length': plume_length_km,
@@ -121,6 +290,45 @@ def calculate_plume(yield_kt, wind_speed_kph, wind_direction):
         'angle': angle
     }
 
+def calculate_plume_batch(yields_kt, wind_speeds_kph, wind_angles_deg, fission_fractions=0.5, distances_miles=None):
+    """
+    Vectorized ensemble version of the centerline step of calculate_full_plume.
+
+    Every input may be a scalar or a 1-D array; they are broadcast against each other,
+    so a sweep of thousands of scenarios is evaluated in one NumPy pass with no
+    per-scenario Python loop. Wind directions are continuous angles in degrees
+    (same convention as DIRECTION_MAP) rather than compass strings.
+
+    Returns a dictionary of arrays:
+        'distances'  (n_distances,)               downwind sample points in miles
+        'dose_rates' (n_scenarios, n_distances)   H+1 centerline dose rate in rad/hr
+        'angles'     (n_scenarios,)               wind angle in degrees, wrapped to [0, 360)
+        plus the broadcast 'yields_kt', 'wind_speeds_mph' and 'fission_fractions'.
+    """
+    if distances_miles is None:
+        distances_miles = DEFAULT_DISTANCES_MILES
+    distances_miles = np.asarray(distances_miles, dtype=float)
+
+    yields_kt, wind_speeds_kph, wind_angles_deg, fission_fractions = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(a, dtype=float))
+          for a in (yields_kt, wind_speeds_kph, wind_angles_deg, fission_fractions))
+    )
+    wind_speeds_mph = wind_speeds_kph * MPH_PER_KPH
+
+    # Scenario parameters become column vectors so they broadcast along the distance axis.
+    dose_rates = _wseg10_dose_rates(
+        yields_kt[:, None], wind_speeds_mph[:, None], fission_fractions[:, None], distances_miles[None, :]
+    )
+
+    return {
+        'distances': distances_miles,
+        'dose_rates': dose_rates,
+        'angles': np.mod(wind_angles_deg, 360.0),
+        'yields_kt': yields_kt,
+        'wind_speeds_mph': wind_speeds_mph,
+        'fission_fractions': fission_fractions,
+    }
+
 # This block allows you to test the model independently by running "python plume_model.py"
 if __name__ == '__main__':
     # --- Test Inputs ---
@@ -139,5 +347,5 @@ if __name__ == '__main__':
     print("Contour Data:")
     for dose_level, points in plume_data['contours'].items():
         # Find the maximum length (max x-value) for each contour
-        max_length = max(p[0] for p in points)
+        max_length = points[:, 0].max()
         print(f"  - {dose_level}: {len(points)} points, max downwind distance: {max_length:.2f} miles")
\ No newline at end of file
@@ -0,0 +1,161 @@
+# population_exposure.py
+
+import io
+import os
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from plume_model import DEFAULT_DOSE_LEVELS
+from task_pool import run_bounded
+
+# Column names looked up in a CSV header row. Files without a header must be lat,lon[,population].
+LAT_NAMES = ('lat', 'latitude', 'y')
+LON_NAMES = ('lon', 'lng', 'longitude', 'x')
+POPULATION_NAMES = ('population', 'pop', 'count', 'weight')
+
+# Work unit sizes: rows per .npy chunk and bytes per CSV chunk.
+DEFAULT_CHUNK_ROWS = 1_000_000
+DEFAULT_CHUNK_BYTES = 32 * 1024 * 1024
+
+def levels_from_contours(contours):
+    """Returns the sorted dose levels (rad/hr) behind contour keys such as '100_rad_hr'."""
+    return sorted(float(key.split('_')[0]) for key in contours)
+
+def band_labels(levels):
+    """Labels for the bands produced by classify(): below the lowest level, then one per level."""
+    levels = sorted(levels)
+    return [f'below_{levels[0]:g}_rad_hr'] + [f'{level:g}_rad_hr' for level in levels]
+
+# --- Worker State ---
+# Each worker process receives the raster once through the pool initializer
+# instead of once per chunk.
+_worker_raster = None
+_worker_levels = None
+
+def _init_worker(raster, levels):
+    global _worker_raster, _worker_levels
+    _worker_raster = raster
+    _worker_levels = np.asarray(sorted(levels), dtype=float)
+
+def _classify(lats, lons, population):
+    """Sums point counts and population per dose band for one chunk."""
+    doses = _worker_raster.sample(lats, lons)
+    bands = np.digitize(doses, _worker_levels)  # 0 = below the lowest level.
+    n_bands = len(_worker_levels) + 1
+    counts = np.bincount(bands, minlength=n_bands)
+    totals = np.bincount(bands, weights=population, minlength=n_bands)
+    return counts, totals
+
+def _split_columns(rows, columns):
+    lat_col, lon_col, pop_col = columns
+    population = rows[:, pop_col] if pop_col is not None else np.ones(len(rows))
+    return rows[:, lat_col], rows[:, lon_col], population
+
+def _process_task(task):
+    """Reads one chunk directly from disk inside the worker and classifies it."""
+    kind, path, start, stop, columns = task
+    if kind == 'npy':
+        # Memory-mapped: only the pages of this slice are touched.
+        rows = np.load(path, mmap_mode='r')[start:stop]
+    else:
+        with open(path, 'rb') as f:
+            # A chunk owns every line that starts inside [start, stop).
+            if start > 0:
+                f.seek(start - 1)
+                f.readline()
+            lines = []
+            while f.tell() < stop:
+                line = f.readline()
+                if not line:
+                    break
+                lines.append(line)
+        if not lines:
+            return None
+        rows = np.loadtxt(io.BytesIO(b''.join(lines)), delimiter=',', ndmin=2)
+    return _classify(*_split_columns(np.asarray(rows, dtype=float), columns))
+
+def _csv_columns(header):
+    """Maps a CSV header to (lat, lon, population) column indices; None means no header."""
+    names = [name.strip().lower() for name in header.split(',')]
+    try:
+        [float(name) for name in names]
+        return None
+    except ValueError:
+        pass
+
+    def find(candidates, required=True):
+        for i, name in enumerate(names):
+            if name in candidates:
+                return i
+        if required:
+            raise ValueError(f"CSV header needs one of the columns {candidates}")
+        return None
+
+    return find(LAT_NAMES), find(LON_NAMES), find(POPULATION_NAMES, required=False)
+
+def _make_tasks(path, chunk_rows, chunk_bytes):
+    """Splits a file into chunk descriptors without reading its data."""
+    if path.endswith('.npy'):
+        data = np.load(path, mmap_mode='r')
+        if data.ndim != 2 or data.shape[1] < 2:
+            raise ValueError("A .npy point file must have shape (n, 2) or (n, 3): lat, lon[, population]")
+        columns = (0, 1, 2 if data.shape[1] > 2 else None)
+        return [('npy', path, start, min(start + chunk_rows, len(data)), columns)
+                for start in range(0, len(data), chunk_rows)]
+
+    with open(path, 'rb') as f:
+        header = f.readline().decode('utf-8')
+    columns = _csv_columns(header)
+    data_start = 0
+    if columns is None:
+        n_cols = len(header.split(','))
+        columns = (0, 1, 2 if n_cols > 2 else None)
+    else:
+        data_start = len(header.encode('utf-8'))
+    size = os.path.getsize(path)
+    return [('csv', path, start, min(start + chunk_bytes, size), columns)
+            for start in range(data_start, size, chunk_bytes)]
+
+def aggregate_exposure(path, raster, levels=DEFAULT_DOSE_LEVELS, workers=None,
+                       chunk_rows=DEFAULT_CHUNK_ROWS, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Streams a point or census-cell file and totals population per dose band.
+
+    `path` is a CSV (lat, lon[, population] with optional header) or a .npy array that is
+    memory-mapped. Each chunk is read by the worker that classifies it against `raster`
+    (a DoseRaster), so the parent never holds the data and memory stays flat. At most two
+    chunks per worker are in flight at once. workers=0 runs everything in this process.
+
+    `levels` is a sequence of dose rates, or the contours of a calculate_full_plume (or
+    calculate_multi_burst) result, in which case the bands follow the drawn contours.
+
+    Returns {band_label: {'points': int, 'population': float}}.
+    """
+    if isinstance(levels, Mapping):
+        levels = levels_from_contours(levels)
+    levels = sorted(levels)
+    labels = band_labels(levels)
+    counts = np.zeros(len(labels), dtype=np.int64)
+    totals = np.zeros(len(labels))
+
+    def accumulate(result):
+        if result is not None:
+            counts[:] += result[0]
+            totals[:] += result[1]
+
+    tasks = ((task,) for task in _make_tasks(path, chunk_rows, chunk_bytes))
+
+    if workers == 0:
+        _init_worker(raster, levels)
+        run_bounded(None, _process_task, tasks, accumulate, 1)
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(raster, levels)) as pool:
+            # Keep a bounded window of chunks in flight so memory does not grow with file size.
+            run_bounded(pool, _process_task, tasks, accumulate, 2 * workers)
+
+    return {label: {'points': int(n), 'population': float(p)}
+            for label, n, p in zip(labels, counts, totals)}
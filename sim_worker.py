@@ -0,0 +1,84 @@
+# sim_worker.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from kivy.clock import Clock
+
+class SimulationWorker:
+    """
+    Runs heavy calculations off the Kivy UI thread.
+
+    Work is submitted on a named channel (e.g. 'plume' or 'graph'). Each new submission
+    supersedes the previous one on the same channel: queued work is cancelled, running
+    work is allowed to finish but its result is dropped. Results are handed back on the
+    main thread through kivy.clock.Clock, so callbacks may touch widgets freely.
+    """
+
+    def __init__(self, max_workers=1):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='simulation')
+        self._lock = threading.Lock()
+        self._generations = {}
+        self._futures = {}
+
+    def submit(self, channel, func, *args, on_result=None, on_error=None, **kwargs):
+        """Schedules func(*args, **kwargs); on_result(result) is called on the main thread."""
+        with self._lock:
+            generation = self._generations.get(channel, 0) + 1
+            self._generations[channel] = generation
+            previous = self._futures.get(channel)
+            if previous is not None:
+                previous.cancel()
+            self._futures[channel] = self._executor.submit(
+                self._run, channel, generation, func, args, kwargs, on_result, on_error
+            )
+
+    def cancel(self, channel):
+        """Drops any pending or running work on the channel."""
+        with self._lock:
+            self._generations[channel] = self._generations.get(channel, 0) + 1
+            future = self._futures.pop(channel, None)
+        if future is not None:
+            future.cancel()
+
+    def shutdown(self):
+        for channel in list(self._futures):
+            self.cancel(channel)
+        self._executor.shutdown(wait=False)
+
+    def _is_current(self, channel, generation):
+        with self._lock:
+            return self._generations.get(channel) == generation
+
+    def _run(self, channel, generation, func, args, kwargs, on_result, on_error):
+        # A request superseded while it waited in the queue is skipped entirely.
+        if not self._is_current(channel, generation):
+            return
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if on_error is not None:
+                # Bound as a default: Python unbinds `e` when the except block ends,
+                # before the clock runs the callback.
+                Clock.schedule_once(lambda dt, error=e: self._deliver(channel, generation, on_error, error))
+            return
+        Clock.schedule_once(lambda dt: self._deliver(channel, generation, on_result, result))
+
+    def _deliver(self, channel, generation, callback, value):
+        # Checked again on the main thread: a newer request may have arrived meanwhile.
+        if callback is not None and self._is_current(channel, generation):
+            callback(value)
+
+def debounce(callback, delay=0.25):
+    """
+    Returns a function that calls callback() once input has been quiet for `delay` seconds.
+    Every call restarts the timer, so dragging a value only triggers one recalculation
+    when it settles instead of one per intermediate value.
+    """
+    trigger = Clock.create_trigger(lambda dt: callback(), delay)
+
+    def restart(*args):
+        trigger.cancel()
+        trigger()
+
+    return restart
@@ -0,0 +1,54 @@
+# startup_profile.py
+
+import os
+import time
+from contextlib import contextmanager
+
+# Time allowed from launch to the first frame, in seconds. Override with NUCLEAR_STARTUP_BUDGET.
+STARTUP_BUDGET_SECONDS = float(os.environ.get('NUCLEAR_STARTUP_BUDGET', '1.5'))
+
+# Set NUCLEAR_STARTUP_REPORT=1 to always print the report (it is printed anyway over budget).
+REPORT_ENABLED = os.environ.get('NUCLEAR_STARTUP_REPORT', '') not in ('', '0')
+
+class StartupProfile:
+    """Records how long each import and build phase of app startup takes."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.phases = []  # (name, start offset, duration) in seconds
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, start - self.t0, time.perf_counter() - start))
+
+    def mark(self, name):
+        """Records an instant, such as the first frame being drawn."""
+        self.phases.append((name, time.perf_counter() - self.t0, 0.0))
+
+    def offset(self, name):
+        for phase_name, start, duration in self.phases:
+            if phase_name == name:
+                return start + duration
+        return None
+
+    def over_budget(self, milestone='first frame', budget=STARTUP_BUDGET_SECONDS):
+        reached = self.offset(milestone)
+        return reached is not None and reached > budget
+
+    def report(self, budget=STARTUP_BUDGET_SECONDS):
+        lines = ['Startup timing (ms):', f"  {'phase':<28}{'start':>9}{'duration':>10}"]
+        for name, start, duration in self.phases:
+            lines.append(f"  {name:<28}{start * 1000:>9.1f}{duration * 1000:>10.1f}")
+        first_frame = self.offset('first frame')
+        if first_frame is not None:
+            status = 'OVER BUDGET' if first_frame > budget else 'within budget'
+            lines.append(f"  first frame after {first_frame * 1000:.0f} ms "
+                         f"({status}: {budget * 1000:.0f} ms)")
+        return '\n'.join(lines)
+
+# Started when main.py first imports this module, before Kivy and everything else.
+startup = StartupProfile()
@@ -0,0 +1,35 @@
+# task_pool.py
+
+from collections import deque
+
+def bounded_map(pool, func, tasks, max_in_flight):
+    """
+    Yields func(*task) for every argument tuple in `tasks`, in order, computed on `pool`
+    (a concurrent.futures executor).
+
+    Tasks are drawn from the iterable lazily and at most `max_in_flight` are submitted
+    ahead of the result being consumed, so memory stays bounded however many tasks there
+    are. pool=None runs every task inline instead.
+    """
+    if pool is None:
+        for task in tasks:
+            yield func(*task)
+        return
+
+    in_flight = deque()
+    try:
+        for task in tasks:
+            in_flight.append(pool.submit(func, *task))
+            if len(in_flight) >= max_in_flight:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+    finally:
+        # Abandoned early (an error or the consumer stopped): drop work not yet started.
+        for future in in_flight:
+            future.cancel()
+
+def run_bounded(pool, func, tasks, consumer, max_in_flight):
+    """Like bounded_map, but hands each result to consumer(result) as it arrives, in order."""
+    for result in bounded_map(pool, func, tasks, max_in_flight):
+        consumer(result)
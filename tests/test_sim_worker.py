@@ -0,0 +1,54 @@
+# test_sim_worker.py
+
+import os
+import sys
+import time
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from kivy.clock import Clock
+
+from sim_worker import SimulationWorker
+
+def _tick_until(condition, timeout=5.0):
+    """Runs the Kivy clock until condition() holds, as the app's main loop would."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for the worker callback")
+        Clock.tick()
+        time.sleep(0.01)
+
+@pytest.fixture
+def worker():
+    worker = SimulationWorker()
+    yield worker
+    worker.shutdown()
+
+def _fail():
+    raise ValueError("bad input")
+
+def test_result_is_delivered_on_clock_tick(worker):
+    results = []
+    worker.submit('plume', sum, [1, 2, 3], on_result=results.append)
+    _tick_until(lambda: results)
+    assert results == [6]
+
+def test_error_is_delivered_on_clock_tick(worker):
+    errors = []
+    worker.submit('plume', _fail, on_result=lambda result: None, on_error=errors.append)
+    _tick_until(lambda: errors)
+    assert isinstance(errors[0], ValueError)
+    assert str(errors[0]) == "bad input"
+
+def test_superseded_result_is_dropped(worker):
+    results = []
+    worker.submit('plume', time.sleep, 0.2, on_result=lambda result: results.append('old'))
+    worker.submit('plume', str, 'new', on_result=results.append)
+    _tick_until(lambda: results)
+    time.sleep(0.3)
+    Clock.tick()
+    assert results == ['new']